@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api import auth, festivals, relationships, wishes, images
+from app.api import auth, festivals, relationships, wishes, images, storage
 
 api_router = APIRouter()
 
@@ -8,3 +8,4 @@ api_router.include_router(festivals.router, prefix="/festivals", tags=["Festival
 api_router.include_router(relationships.router, prefix="/relationships", tags=["Relationships"])
 api_router.include_router(wishes.router, prefix="/wishes", tags=["Wishes"])
 api_router.include_router(images.router, prefix="/images", tags=["Images"])
+api_router.include_router(storage.router, prefix="/storage", tags=["Storage"])
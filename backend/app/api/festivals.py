@@ -1,58 +1,208 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from datetime import date, timedelta
 from typing import Optional
 from uuid import UUID
 from app.schemas.festivals import (
-    FestivalList, FestivalDetail, Festival,
+    FestivalList, FestivalDetail, Festival, FestivalSearchResults, UpcomingFestivals,
     RandomContent, FestivalQuote, FestivalImage
 )
-from app.services.festival_service import FestivalService
+from app.services.festival_service import (
+    FestivalService, parse_fields,
+    LIST_FIELDS, LIST_FIELD_CHOICES, DETAIL_FIELDS, DETAIL_FIELD_CHOICES
+)
+from app.services.catalog_service import CatalogSnapshot, catalog_cache, get_catalog
+from app.services.calendar_service import festival_calendar
+from app.services.search_service import festival_search
+from app.core.compression import supported_encodings
+from app.core.config import settings
+from app.core.http_cache import cached_json_response, snapshot_cache_headers
 
 router = APIRouter()
 
+FIELDS_DESCRIPTION = "Comma-separated fields to return (id, name and slug are always included)"
+
+
+def _detail_body(catalog: CatalogSnapshot, festival_id: str) -> dict:
+    return FestivalDetail.model_validate(
+        catalog.festival_detail(festival_id)
+    ).model_dump(mode="json", exclude_unset=True)
+
+
+async def _detail_response(request: Request, catalog: CatalogSnapshot, festival_id: str):
+    """Pre-encoded festival detail for the current catalog version"""
+    return await cached_json_response(
+        request,
+        catalog,
+        f"festival:{festival_id}",
+        lambda: _detail_body(catalog, festival_id)
+    )
+
+
+def prewarm_upcoming(catalog: CatalogSnapshot) -> None:
+    """Encode and compress the detail bodies of festivals about to take place"""
+    festival_ids = festival_calendar.festival_ids_within(catalog, settings.CATALOG_PREWARM_DAYS)
+    for festival_id in festival_ids:
+        key = f"festival:{festival_id}"
+        payload = catalog.encoded(key, lambda: _detail_body(catalog, festival_id))
+        if len(payload) >= settings.COMPRESSION_MIN_SIZE:
+            for encoding in supported_encodings():
+                catalog.compressed(key, encoding)
+
+
+catalog_cache.on_load(prewarm_upcoming)
+
 
-@router.get("", response_model=FestivalList)
+@router.get("", response_model=FestivalList, response_model_exclude_unset=True)
 async def get_festivals(
+    request: Request,
     culture: Optional[str] = Query(None, description="Filter by religion/culture"),
-    month: Optional[str] = Query(None, description="Filter by typical month")
+    month: Optional[str] = Query(None, description="Filter by typical month"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    catalog: CatalogSnapshot = Depends(get_catalog)
 ):
-    """Get all festivals with optional filtering"""
+    """
+    Get all festivals with optional filtering.
+    Defaults to the fields a festival card displays.
+    """
+    selected = parse_fields(fields, LIST_FIELD_CHOICES, LIST_FIELDS)
+    
+    if not fields:
+        if culture:
+            festivals = catalog.festivals_by_culture.get(culture, [])
+            key = f"festivals:culture:{culture}"
+        elif month:
+            festivals = catalog.festivals_by_month.get(month, [])
+            key = f"festivals:month:{month}"
+        else:
+            festivals = catalog.festivals
+            key = "festivals"
+        
+        return await cached_json_response(
+            request,
+            catalog,
+            # Unknown filter values share one empty body rather than a key each
+            key if festivals else "festivals:empty",
+            lambda: FestivalList.model_validate({
+                "festivals": catalog.festival_list(selected, festivals),
+                "total": len(festivals)
+            }).model_dump(mode="json", exclude_unset=True)
+        )
+    
+    # Custom projections are read through, so neither pre-encoded nor
+    # cacheable by catalog version
     service = FestivalService()
     
     if culture:
-        festivals = await service.get_by_culture(culture)
+        festivals = await service.get_by_culture(culture, selected)
     elif month:
-        festivals = await service.get_by_month(month)
+        festivals = await service.get_by_month(month, selected)
     else:
-        festivals = await service.get_all()
+        festivals = await service.get_all(fields=selected)
+    
+    return {
+        "festivals": festivals,
+        "total": len(festivals)
+    }
+
+
+@router.get("/search", response_model=FestivalSearchResults, response_model_exclude_unset=True)
+async def search_festivals(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100, description="Search text; the last word matches as a prefix"),
+    limit: int = Query(10, ge=1, le=50),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    catalog: CatalogSnapshot = Depends(get_catalog)
+):
+    """
+    Search festivals by name, description, traditions and quotes.
+    Served from an in-memory index of the catalog, so it also suits autocomplete.
+    """
+    selected = parse_fields(fields, LIST_FIELD_CHOICES, LIST_FIELDS)
+    # Results depend only on the query and the catalog version
+    response.headers.update(snapshot_cache_headers(request, catalog))
+    results = festival_search.search(catalog, q, selected, limit)
+    
+    return {
+        "query": q,
+        "results": results,
+        "total": len(results)
+    }
+
+
+@router.get("/upcoming", response_model=UpcomingFestivals, response_model_exclude_unset=True)
+async def get_upcoming_festivals(
+    days: int = Query(30, ge=1, le=366, description="How many days ahead to look"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    # Not cacheable by version: the answer changes with the date too
+    catalog: CatalogSnapshot = Depends(get_catalog)
+):
+    """
+    Festivals taking place from today through the next days, soonest first.
+    Dates are estimated from typical_month unless concrete dates are on file.
+    """
+    selected = parse_fields(fields, LIST_FIELD_CHOICES, LIST_FIELDS)
+    today = date.today()
+    festivals = festival_calendar.upcoming(catalog, days, selected, today)
     
     return {
+        "from_date": today,
+        "to_date": today + timedelta(days=days),
         "festivals": festivals,
         "total": len(festivals)
     }
 
 
-@router.get("/{festival_id}", response_model=FestivalDetail)
-async def get_festival(festival_id: UUID):
+@router.get("/{festival_id}", response_model=FestivalDetail, response_model_exclude_unset=True)
+async def get_festival(
+    request: Request,
+    festival_id: UUID,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    catalog: CatalogSnapshot = Depends(get_catalog)
+):
     """
     Get complete festival details including quotes, images, and cultural content.
     This is the SEO-friendly festival page content.
     """
+    selected = parse_fields(fields, DETAIL_FIELD_CHOICES, DETAIL_FIELDS)
+    
+    if not fields and str(festival_id) in catalog.festivals_by_id:
+        return await _detail_response(request, catalog, str(festival_id))
+    
+    # Projected, or not in the catalog snapshot (inactive or added since): read through
     service = FestivalService()
-    return await service.get_festival_detail(festival_id)
+    return await service.get_festival_detail(festival_id, selected)
 
 
-@router.get("/slug/{slug}", response_model=FestivalDetail)
-async def get_festival_by_slug(slug: str):
+@router.get("/slug/{slug}", response_model=FestivalDetail, response_model_exclude_unset=True)
+async def get_festival_by_slug(
+    request: Request,
+    slug: str,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    catalog: CatalogSnapshot = Depends(get_catalog)
+):
     """Get festival by URL slug (for SEO-friendly URLs)"""
+    selected = parse_fields(fields, DETAIL_FIELD_CHOICES, DETAIL_FIELDS)
+    
+    festival = catalog.festivals_by_slug.get(slug)
+    if festival and not fields:
+        return await _detail_response(request, catalog, festival["id"])
+    
     service = FestivalService()
-    festival = await service.get_by_slug(slug)
-    return await service.get_festival_detail(UUID(festival["id"]))
+    if not festival:
+        # Not in the catalog snapshot (inactive or added since)
+        festival = await service.get_by_slug(slug, ["id"])
+    return await service.get_festival_detail(UUID(festival["id"]), selected)
 
 
 @router.get("/{festival_id}/random-content", response_model=RandomContent)
 async def get_random_content(
     festival_id: UUID,
-    relationship_id: Optional[UUID] = Query(None, description="Relationship ID for message")
+    relationship_id: Optional[UUID] = Query(None, description="Relationship ID for message"),
+    session_id: Optional[str] = Header(
+        None, alias="X-Session-Id", max_length=64,
+        description="Browser session; content then rotates without repeats"
+    )
 ):
     """
     Get random content for a festival.
@@ -60,6 +210,11 @@ async def get_random_content(
     """
     service = FestivalService()
     
+    if session_id:
+        rotated = await service.get_rotated_content(session_id, festival_id, relationship_id)
+        if rotated is not None:
+            return rotated
+    
     result = {
         "quote": None,
         "image": None,
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, UploadFile, File
-from typing import List
+from fastapi import APIRouter, Depends, UploadFile, File, Query
+from typing import List, Optional
 from uuid import UUID
 from app.schemas.images import ImageUploadResponse, ImageList
 from app.services.image_service import ImageService
 from app.api.deps import get_current_user
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter()
 
@@ -41,15 +42,20 @@ async def upload_image(
 
 @router.get("/my-images", response_model=ImageList)
 async def get_my_images(
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
 ):
-    """Get all images uploaded by current user"""
+    """Get images uploaded by current user, newest first, one page at a time"""
     service = ImageService()
-    images = await service.get_user_images(UUID(current_user["id"]))
+    images, next_cursor = await service.get_user_images(
+        UUID(current_user["id"]), limit, cursor
+    )
     
     return {
         "images": images,
-        "total": len(images)
+        "total": len(images),
+        "next_cursor": next_cursor
     }
 
 
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query, Request
 from typing import Optional
 from app.schemas.relationships import RelationshipList, Relationship
 from app.services.relationship_service import RelationshipService
+from app.services.catalog_service import CatalogSnapshot, get_catalog
+from app.core.http_cache import cached_json_response
 from uuid import UUID
 
 router = APIRouter()
@@ -9,35 +11,45 @@ router = APIRouter()
 
 @router.get("", response_model=RelationshipList)
 async def get_relationships(
-    category: Optional[str] = Query(None, description="Filter by category")
+    request: Request,
+    category: Optional[str] = Query(None, description="Filter by category"),
+    catalog: CatalogSnapshot = Depends(get_catalog)
 ):
     """
     Get all relationship types for dropdown selection.
     Returns 20+ relationships organized by category.
     """
-    service = RelationshipService()
-    
     if category:
-        relationships = await service.get_by_category(category)
+        relationships = catalog.relationships_by_category.get(category, [])
+        # Unknown categories share one empty body rather than a key each
+        key = f"relationships:category:{category}" if relationships else "relationships:empty"
     else:
-        relationships = await service.get_all()
+        relationships = catalog.relationships
+        key = "relationships"
     
-    return {
-        "relationships": relationships,
-        "total": len(relationships)
-    }
+    return await cached_json_response(
+        request,
+        catalog,
+        key,
+        lambda: RelationshipList.model_validate({
+            "relationships": relationships,
+            "total": len(relationships)
+        }).model_dump(mode="json")
+    )
 
 
 @router.get("/categories")
-async def get_relationship_categories():
+async def get_relationship_categories(
+    request: Request,
+    catalog: CatalogSnapshot = Depends(get_catalog)
+):
     """Get unique relationship categories"""
-    service = RelationshipService()
-    relationships = await service.get_all()
-    
-    categories = list(set(r.get("category") for r in relationships if r.get("category")))
-    categories.sort()
-    
-    return {"categories": categories}
+    return await cached_json_response(
+        request,
+        catalog,
+        "relationship_categories",
+        lambda: {"categories": catalog.categories}
+    )
 
 
 @router.get("/{relationship_id}", response_model=Relationship)
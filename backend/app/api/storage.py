@@ -0,0 +1,68 @@
+"""
+Local storage route: serves objects of the ``local`` storage backend.
+
+Files are sent with sendfile when the ASGI server offers the
+``http.response.zerocopysend`` extension. Otherwise, as under uvicorn,
+Starlette's FileResponse streams them in chunks.
+"""
+
+from fastapi import APIRouter, Query
+from fastapi.responses import FileResponse
+from typing import Optional
+import os
+import anyio
+from app.core.storage import LocalStorage, get_storage
+from app.core.exceptions import NotFoundException, UnauthorizedException
+
+router = APIRouter()
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """FileResponse that hands the file to the server for sendfile when it supports zero-copy send"""
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["method"].upper() == "HEAD" or "http.response.zerocopysend" not in scope.get("extensions", {}):
+            await super().__call__(scope, receive, send)
+            return
+
+        if self.stat_result is None:
+            self.set_stat_headers(await anyio.to_thread.run_sync(os.stat, self.path))
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            await send({"type": "http.response.zerocopysend", "file": file, "more_body": False})
+        finally:
+            file.close()
+        if self.background is not None:
+            await self.background()
+
+
+@router.get("/{path:path}")
+async def get_object(
+    path: str,
+    expires: Optional[int] = Query(None),
+    signature: Optional[str] = Query(None)
+):
+    """Serve an object from the local storage backend"""
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise NotFoundException("Object", path)
+
+    full_path = storage.resolve(path)
+    # Judge privacy on the normalized path so "public/../generated_cards/x" is caught
+    private = storage.requires_signature(full_path.relative_to(storage.root).as_posix())
+
+    # Private objects need a valid signature; a signature given for a public one is checked too
+    if private or signature is not None or expires is not None:
+        if expires is None or signature is None or not storage.verify_signature(path, expires, signature):
+            raise UnauthorizedException("Invalid or expired signature")
+
+    if not full_path.is_file():
+        raise NotFoundException("Object", path)
+
+    # HEAD gets headers only
+    return ZeroCopyFileResponse(full_path)
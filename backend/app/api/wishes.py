@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, Query, Response
 from typing import Optional
 from uuid import UUID
-from app.schemas.wishes import WishCreate, WishPreview, WishResponse, GeneratedWish
-from app.services.wish_service import WishService
+from app.schemas.wishes import WishCreate, WishPreview, WishPreviewBatch, WishResponse, GeneratedWish
+from app.services.wish_service import MAX_PREVIEW_BATCH, WishService
 from app.services.card_service import CardService
 from app.services.festival_service import FestivalService
 from app.services.messaging import MessageChannelFactory
 from app.api.deps import get_current_user, get_current_user_optional
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter()
 
@@ -28,7 +29,9 @@ async def create_wish(
         recipient_name=wish_data.recipient_name,
         custom_message=wish_data.custom_message,
         user_image_id=wish_data.user_image_id,
-        channel_type=wish_data.channel_type
+        channel_type=wish_data.channel_type,
+        recipient_contact=wish_data.recipient_contact,
+        scheduled_at=wish_data.scheduled_at
     )
     
     return {
@@ -60,6 +63,31 @@ async def preview_wish(
     )
 
 
+@router.get("/preview/batch", response_model=WishPreviewBatch)
+async def preview_wish_batch(
+    festival_id: UUID,
+    relationship_id: UUID,
+    count: int = Query(5, ge=1, le=MAX_PREVIEW_BATCH),
+    custom_message: Optional[str] = Query(None),
+    recipient_name: Optional[str] = Query(None)
+):
+    """
+    Preview several distinct wish variations at once (for the preview carousel).
+    Fewer than count are returned when there are not enough combinations.
+    """
+    service = WishService()
+    
+    previews = await service.generate_preview_batch(
+        festival_id=festival_id,
+        relationship_id=relationship_id,
+        count=count,
+        custom_message=custom_message,
+        recipient_name=recipient_name
+    )
+    
+    return {"previews": previews, "total": len(previews)}
+
+
 @router.post("/{wish_id}/generate-card", response_model=WishResponse)
 async def generate_card(
     wish_id: UUID,
@@ -70,20 +98,16 @@ async def generate_card(
     card_service = CardService()
     festival_service = FestivalService()
     
-    wish = await wish_service.get_wish(wish_id)
+    # The wish with its image URL and quote text embedded
+    wish = await wish_service.get_wish_for_card(wish_id)
     
     # Get image URL
-    if wish.get("user_image_id"):
-        from app.services.image_service import ImageService
-        image_service = ImageService()
-        user_image = await image_service.get_image(UUID(wish["user_image_id"]))
-        image_url = user_image["image_url"]
-    elif wish.get("image_id"):
-        images = await festival_service.get_images(UUID(wish["festival_id"]))
-        image = next((i for i in images if i["id"] == wish["image_id"]), None)
-        image_url = image["image_url"] if image else ""
+    if wish.get("user_image"):
+        image_url = wish["user_image"]["image_url"]
+    elif wish.get("image"):
+        image_url = wish["image"]["image_url"]
     else:
-        random_image = await festival_service.get_random_image(UUID(wish["festival_id"]))
+        random_image = await festival_service.pick_random_image(UUID(wish["festival_id"]))
         image_url = random_image["image_url"] if random_image else ""
     
     if not image_url:
@@ -93,11 +117,7 @@ async def generate_card(
         }
     
     # Get quote if available
-    quote_text = None
-    if wish.get("quote_id"):
-        quotes = await festival_service.get_quotes(UUID(wish["festival_id"]))
-        quote = next((q for q in quotes if q["id"] == wish["quote_id"]), None)
-        quote_text = quote["quote_text"] if quote else None
+    quote_text = wish["quote"]["quote_text"] if wish.get("quote") else None
     
     # Generate card
     card_bytes = await card_service.generate_card(
@@ -149,12 +169,15 @@ async def download_card(wish_id: UUID):
 @router.get("/history")
 async def get_wish_history(
     current_user: dict = Depends(get_current_user),
-    limit: int = Query(50, le=100)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
 ):
-    """Get current user's wish history"""
+    """Get current user's wish history, newest first, one page at a time"""
     service = WishService()
-    wishes = await service.get_user_wishes(UUID(current_user["id"]), limit)
-    return {"wishes": wishes, "total": len(wishes)}
+    wishes, next_cursor = await service.get_user_wishes(
+        UUID(current_user["id"]), limit, cursor
+    )
+    return {"wishes": wishes, "total": len(wishes), "next_cursor": next_cursor}
 
 
 @router.get("/{wish_id}", response_model=GeneratedWish)
@@ -167,5 +190,5 @@ async def get_wish(wish_id: UUID):
 @router.get("/channels/available")
 async def get_available_channels():
     """Get available message channels"""
-    channels = MessageChannelFactory.get_available_channels()
+    channels = await MessageChannelFactory.get_available_channels()
     return {"channels": channels}
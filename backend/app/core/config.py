@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 
 
@@ -17,12 +17,78 @@ class Settings(BaseSettings):
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:5173"
     
     # Storage
+    STORAGE_BACKEND: str = "supabase"  # supabase, local
     STORAGE_BUCKET: str = "festwish-images"
+    STORAGE_LOCAL_ROOT: str = "./storage"
+    STORAGE_PUBLIC_URL: str = "http://localhost:8000"
+    
+    # Wish delivery (outbox workers)
+    DELIVERY_WORKERS: int = 1
+    DELIVERY_BATCH_SIZE: int = 50
+    DELIVERY_POLL_INTERVAL_SECONDS: float = 2.0
+    DELIVERY_LEASE_SECONDS: int = 300
+    DELIVERY_MAX_ATTEMPTS: int = 6
+    DELIVERY_RETRY_BASE_SECONDS: int = 30
+    DELIVERY_RETRY_MAX_SECONDS: int = 3600
+    DELIVERY_SCHEDULER_ENABLED: bool = True
+    DELIVERY_SCHEDULER_HORIZON_SECONDS: float = 300.0
+    DELIVERY_SCHEDULER_MAX_QUEUED: int = 100000
+    DELIVERY_SPREAD_SECONDS: float = 900.0  # Spread each scheduled peak over this window
+    
+    # Channel provider limits: "channel:sends_per_second" pairs (0 = unlimited)
+    CHANNEL_RATE_LIMITS: str = "whatsapp:80,sms:10,email:14,download:0"
+    CHANNEL_MAX_QUEUE: int = 1000
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_SECONDS: float = 30.0
+    CHANNEL_AVAILABILITY_TTL_SECONDS: float = 60.0
+    CHANNEL_AVAILABILITY_TIMEOUT_SECONDS: float = 5.0
+    
+    # Email channel (SMTP)
+    SMTP_HOST: str = ""
+    SMTP_PORT: int = 587
+    SMTP_USERNAME: str = ""
+    SMTP_PASSWORD: str = ""
+    SMTP_USE_TLS: bool = True  # STARTTLS
+    SMTP_FROM: str = "FestWish <wishes@festwish.app>"
+    SMTP_POOL_SIZE: int = 4
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    
+    # Catalog (festivals, relationships) caching
+    CATALOG_CACHE_TTL_SECONDS: float = 300.0  # How often the in-memory catalog is reloaded
+    CATALOG_CACHE_MAX_AGE: int = 3600  # Cache-Control max-age for catalog responses
+    CATALOG_STALE_WHILE_REVALIDATE: int = 86400
+    CATALOG_PREWARM_DAYS: int = 45  # Festivals this close get their bodies encoded on catalog load
+    CATALOG_PAGE_SIZE: int = 1000  # Rows per catalog query; keep at or below PostgREST max-rows
+    
+    # Response compression (gzip, or brotli when installed)
+    COMPRESSION_MIN_SIZE: int = 1024  # Smaller bodies are sent as-is
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    
+    # Prometheus metrics (/metrics)
+    METRICS_ENABLED: bool = True
+    
+    # Database call instrumentation
+    DB_SLOW_QUERY_SECONDS: float = 0.5  # Slower calls are logged with their shape
+    DB_ROUNDTRIPS_WARN_THRESHOLD: int = 10  # Warn when a request makes more calls
+    SINGLE_FLIGHT_TIMEOUT_SECONDS: float = 10.0  # Max wait on a shared in-flight read
+    
+    # Non-repeating "shuffle" rotation, per browser session
+    SHUFFLE_BAG_MAX_BAGS: int = 100000  # Least recently used bags are dropped beyond this
     
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
     
+    @property
+    def channel_rate_limits(self) -> Dict[str, float]:
+        limits = {}
+        for pair in self.CHANNEL_RATE_LIMITS.split(","):
+            if ":" in pair:
+                channel, rate = pair.split(":", 1)
+                limits[channel.strip().lower()] = float(rate)
+        return limits
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,27 +1,30 @@
-from supabase import create_client, Client
+from supabase import create_client
 from app.core.config import settings
+from app.core.db_instrumentation import InstrumentedClient
 import logging
 
 logger = logging.getLogger(__name__)
 
-_supabase_client: Client = None
-_supabase_admin_client: Client = None
+_supabase_client: InstrumentedClient = None
+_supabase_admin_client: InstrumentedClient = None
 
 
-def get_supabase() -> Client:
+def get_supabase() -> InstrumentedClient:
     """Get Supabase client with anon key (for authenticated user operations)"""
     global _supabase_client
     if _supabase_client is None:
-        _supabase_client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+        _supabase_client = InstrumentedClient(
+            create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+        )
     return _supabase_client
 
 
-def get_supabase_admin() -> Client:
+def get_supabase_admin() -> InstrumentedClient:
     """Get Supabase client with service role key (for admin operations)"""
     global _supabase_admin_client
     if _supabase_admin_client is None:
-        _supabase_admin_client = create_client(
-            settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY
+        _supabase_admin_client = InstrumentedClient(
+            create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
         )
     return _supabase_admin_client
 
@@ -0,0 +1,215 @@
+"""
+Instrumented Supabase client.
+
+``InstrumentedClient`` wraps the supabase-py client returned by
+``get_supabase``/``get_supabase_admin``. Every ``table(...)`` and ``rpc(...)``
+query builder is proxied, so when ``execute()`` runs we know:
+
+- the target (table or function name) and the query shape: the chain of
+  builder calls with filtered columns but no values, e.g.
+  ``select eq(festival_id) eq(is_active) order(name)``
+- rows returned and duration
+
+Payload bytes are not measured: postgrest-py drops the raw response, and
+re-serializing every result just to count it would cost more than it tells.
+
+Calls slower than ``DB_SLOW_QUERY_SECONDS`` are logged. Round-trips are
+also counted per request (``track_queries``); ``QueryTrackingMiddleware``
+reports them per route and warns above ``DB_ROUNDTRIPS_WARN_THRESHOLD``.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, List, Optional, Tuple
+import logging
+import threading
+import time
+
+from app.core.config import settings
+from app.core.metrics import registry, route_template
+
+logger = logging.getLogger(__name__)
+
+# Builder methods whose first argument is a column name worth recording
+_COLUMN_FILTERS = {
+    "eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "is_", "in_",
+    "contains", "contained_by", "ov", "fts", "plfts", "phfts", "wfts",
+    "text_search", "filter", "order",
+}
+# Kept per tracked request, for the round-trip warning
+MAX_TRACKED_SHAPES = 50
+
+db_query_duration = registry.histogram(
+    "festwish_db_query_duration_seconds", "Supabase round-trip latency", ("target", "operation")
+)
+db_query_errors = registry.counter(
+    "festwish_db_query_errors_total", "Supabase calls that raised", ("target", "operation")
+)
+db_rows = registry.counter(
+    "festwish_db_rows_total", "Rows returned by Supabase calls", ("target",)
+)
+db_roundtrips_per_request = registry.histogram(
+    "festwish_db_roundtrips_per_request", "Supabase calls made while serving a request", ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34)
+)
+
+
+@dataclass
+class QueryStats:
+    """Round-trips made within one tracked scope (usually a request)"""
+    count: int = 0
+    seconds: float = 0.0
+    shapes: List[str] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, shape: str, seconds: float) -> None:
+        # Queries run in worker threads too (asyncio.to_thread copies the context)
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            if len(self.shapes) < MAX_TRACKED_SHAPES:
+                self.shapes.append(shape)
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Count Supabase round-trips made inside the block:
+
+        with track_queries() as stats:
+            await service.get_all()
+        assert stats.count == 2
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def _row_count(data: Any) -> int:
+    if data is None:
+        return 0
+    if isinstance(data, list):
+        return len(data)
+    return 1
+
+
+class InstrumentedQuery:
+    """Proxy for a postgrest request builder that records the call chain and times execute()"""
+
+    def __init__(self, builder, target: str, operation: str, ops: Tuple[str, ...] = ()):
+        self._builder = builder
+        self._target = target
+        self._operation = operation
+        self._ops = ops
+
+    def _wrap(self, result, op: str, operation: Optional[str] = None):
+        if hasattr(result, "execute") or hasattr(result, "select"):
+            return InstrumentedQuery(
+                result, self._target, operation or self._operation, self._ops + (op,)
+            )
+        return result
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            # Properties such as not_ return the builder itself
+            return self._wrap(attr, name.rstrip("_"))
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            op = name
+            if name in _COLUMN_FILTERS and args and isinstance(args[0], str):
+                op = f"{name}({args[0]})"
+            operation = name if name in ("select", "insert", "update", "upsert", "delete") else None
+            return self._wrap(result, op, operation)
+
+        return call
+
+    @property
+    def shape(self) -> str:
+        return f"{self._target} {' '.join(self._ops)}".strip()
+
+    def execute(self):
+        started = time.perf_counter()
+        try:
+            response = self._builder.execute()
+        except Exception:
+            elapsed = time.perf_counter() - started
+            db_query_errors.inc(self._target, self._operation)
+            self._record(elapsed)
+            raise
+
+        elapsed = time.perf_counter() - started
+        data = getattr(response, "data", None)
+        rows = _row_count(data)
+
+        db_rows.inc(self._target, amount=rows)
+        self._record(elapsed)
+
+        if elapsed >= settings.DB_SLOW_QUERY_SECONDS:
+            logger.warning(f"Slow query {elapsed * 1000:.0f}ms: {self.shape} ({rows} rows)")
+        return response
+
+    def _record(self, elapsed: float) -> None:
+        db_query_duration.observe(elapsed, self._target, self._operation)
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(self.shape, elapsed)
+
+
+class InstrumentedClient:
+    """supabase-py Client whose table() and rpc() queries are instrumented"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, table_name: str) -> InstrumentedQuery:
+        return InstrumentedQuery(self._client.table(table_name), table_name, "select")
+
+    from_ = table
+
+    def rpc(self, fn: str, params: dict) -> InstrumentedQuery:
+        return InstrumentedQuery(self._client.rpc(fn, params), f"rpc:{fn}", "rpc")
+
+    def __getattr__(self, name: str):
+        # auth, storage, postgrest, ... are used as-is
+        return getattr(self._client, name)
+
+
+class QueryTrackingMiddleware:
+    """Counts Supabase round-trips per request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                # Exposed in debug so tests can assert on N+1 regressions
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-roundtrips", str(stats.count).encode())
+                ]
+            await send(message)
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = route_template(scope)
+                db_roundtrips_per_request.observe(stats.count, route)
+                if stats.count > settings.DB_ROUNDTRIPS_WARN_THRESHOLD:
+                    logger.warning(
+                        f"{scope['method']} {route} made {stats.count} database round-trips "
+                        f"({stats.seconds * 1000:.0f}ms): {'; '.join(stats.shapes[:10])}"
+                    )
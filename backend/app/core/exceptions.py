@@ -32,3 +32,9 @@ class StorageException(FestWishException):
     """Storage operation exception"""
     def __init__(self, detail: str):
         super().__init__(detail=detail, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class UpstreamTimeoutException(FestWishException):
+    """Upstream (database) call did not complete in time"""
+    def __init__(self, detail: str = "Upstream request timed out"):
+        super().__init__(detail=detail, status_code=status.HTTP_504_GATEWAY_TIMEOUT)
@@ -0,0 +1,86 @@
+"""
+HTTP caching helpers: ETag validators, conditional GET matching and
+Cache-Control headers for content that rarely changes.
+"""
+
+from typing import Any, Callable, Dict, Optional
+import asyncio
+
+from fastapi import Request, Response
+
+from app.core.compression import negotiate_encoding
+from app.core.config import settings
+
+
+class NotModified(Exception):
+    """Raised when the client's cached copy is still current (answered with 304)"""
+
+    def __init__(self, headers: Dict[str, str]):
+        self.headers = headers
+
+
+def weak_etag(version: str) -> str:
+    """Weak validator for a content version"""
+    return f'W/"{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check using weak comparison (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Validator and freshness headers for a cacheable response"""
+    return {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={settings.CATALOG_CACHE_MAX_AGE}, "
+            f"stale-while-revalidate={settings.CATALOG_STALE_WHILE_REVALIDATE}"
+        ),
+    }
+
+
+def snapshot_cache_headers(request: Request, snapshot) -> Dict[str, str]:
+    """
+    ETag and public caching headers for a body derived only from a snapshot.
+    Raises NotModified when the client's copy is of the current version.
+    """
+    headers = cache_headers(weak_etag(snapshot.version))
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        raise NotModified(headers)
+    return headers
+
+
+async def cached_json_response(
+    request: Request,
+    snapshot,
+    key: str,
+    build: Callable[[], Any]
+) -> Response:
+    """
+    Response for a body pre-encoded on a versioned snapshot (see
+    CatalogSnapshot.encoded), precompressed when the client accepts it.
+    A variant not yet compressed is built in a worker thread.
+    """
+    headers = snapshot_cache_headers(request, snapshot)
+    payload = snapshot.encoded(key, build)
+    headers["Vary"] = "Accept-Encoding"
+
+    if len(payload) >= settings.COMPRESSION_MIN_SIZE:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding:
+            compressed = snapshot.precompressed(key, encoding)
+            if compressed is None:
+                compressed = await asyncio.to_thread(snapshot.compressed, key, encoding)
+            payload = compressed
+            headers["Content-Encoding"] = encoding
+
+    return Response(content=payload, media_type="application/json", headers=headers)
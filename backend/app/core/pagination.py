@@ -0,0 +1,59 @@
+"""
+Keyset (cursor) pagination on (created_at, id), newest first.
+
+Cursors are opaque to clients: a URL-safe base64 encoding of the last row's
+created_at and id. Each page is a single index range scan regardless of how
+deep the client has paged.
+"""
+
+from typing import List, Optional, Tuple
+from uuid import UUID
+import base64
+import binascii
+from app.core.exceptions import ValidationException
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(row: dict) -> str:
+    """Build the cursor pointing after a row"""
+    raw = f"{row['created_at']}|{row['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor into (created_at, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationException("Invalid pagination cursor")
+    return created_at, row_id
+
+
+def apply_keyset(query, limit: int, cursor: Optional[str] = None):
+    """Order a PostgREST query newest first and start it after the cursor"""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # Quote values: timestamps contain PostgREST reserved characters
+        query = query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt.{row_id})'
+        )
+
+    # PostgREST needs both sort keys in one order parameter; this renders as
+    # order=created_at.desc,id.desc. Fetch one extra row to learn whether
+    # another page exists.
+    return query\
+        .order("created_at.desc,id", desc=True)\
+        .limit(limit + 1)
+
+
+def paginate(rows: List[dict], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """Split a limit + 1 result into the page and the next cursor"""
+    if len(rows) > limit:
+        page = rows[:limit]
+        return page, encode_cursor(page[-1])
+    return rows, None
@@ -0,0 +1,89 @@
+"""
+Single-flight request coalescing.
+
+Concurrent calls for the same key share one in-flight upstream call: the
+first caller starts it, later callers await the same result (or the same
+exception). Nothing is cached once the call finishes, so results are never
+stale; this only collapses bursts of identical reads into one round-trip.
+
+Results are shared between callers and must be treated as read-only.
+"""
+
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+import asyncio
+import logging
+
+from app.core.exceptions import UpstreamTimeoutException
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _freeze(value: Any) -> Hashable:
+    """Hashable form of call arguments (lists, sets and dicts included)"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with equal keys into one upstream call"""
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        timeout: Optional[float] = None
+    ) -> T:
+        """Run fn() for key, or join the call already in flight for it"""
+        future = self._calls.get(key)
+        if future is None:
+            self.leaders += 1
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+            # Mark the exception retrieved even if every waiter timed out
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        else:
+            self.followers += 1
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            # shield: one waiter timing out or disconnecting must not cancel the shared call
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            # Let the next caller start a fresh call instead of joining a stuck one
+            self._forget(key, future)
+            logger.warning(f"Upstream call timed out after {timeout}s: {key!r}")
+            raise UpstreamTimeoutException()
+
+    def coalesce(self, fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        """Decorate an async method so concurrent calls with equal arguments share one call"""
+        name = fn.__qualname__
+
+        @wraps(fn)
+        async def wrapper(instance, *args, **kwargs):
+            key = (name, _freeze(args), _freeze(kwargs))
+            return await self.do(key, lambda: fn(instance, *args, **kwargs))
+
+        return wrapper
@@ -0,0 +1,300 @@
+"""
+Storage Abstraction Layer
+-------------------------
+Backend-agnostic object storage used for festival images, user uploads
+and generated cards. The active backend is selected by
+``settings.STORAGE_BACKEND``:
+
+- ``supabase``: Supabase Storage bucket (default)
+- ``local``: files under ``settings.STORAGE_LOCAL_ROOT``, served by the
+  ``/storage`` route (generated cards only through signed URLs)
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional
+from urllib.parse import quote, urlencode
+import hashlib
+import hmac
+import os
+import tempfile
+import time
+import logging
+
+from app.core.config import settings
+from app.core.exceptions import NotFoundException, StorageException
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_PAGE_SIZE = 1000
+# Objects under these prefixes are only handed out as signed URLs
+SIGNED_PREFIXES = ("generated_cards/",)
+
+
+@dataclass
+class StorageObject:
+    """An object listed from storage"""
+    path: str
+    updated_at: Optional[datetime] = None
+
+
+class StorageBackend(ABC):
+    """Abstract base class for object storage backends"""
+
+    @property
+    @abstractmethod
+    def backend_type(self) -> str:
+        """Return the backend type identifier"""
+        pass
+
+    @abstractmethod
+    def upload(
+        self,
+        path: str,
+        content: bytes,
+        content_type: str,
+        upsert: bool = False
+    ) -> None:
+        """Store an object, failing if it exists unless upsert is set"""
+        pass
+
+    @abstractmethod
+    def get(self, path: str) -> bytes:
+        """Read a whole object"""
+        pass
+
+    @abstractmethod
+    def stream(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Read an object in chunks"""
+        pass
+
+    @abstractmethod
+    def remove(self, paths: List[str]) -> None:
+        """Remove objects; missing paths are ignored"""
+        pass
+
+    @abstractmethod
+    def list(self, prefix: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[StorageObject]]:
+        """Yield pages of objects under prefix, recursing into folders"""
+        pass
+
+    @abstractmethod
+    def create_signed_url(self, path: str, expires_in: int) -> str:
+        """Create a URL granting read access for expires_in seconds"""
+        pass
+
+    @abstractmethod
+    def get_public_url(self, path: str) -> str:
+        """Get the public URL of an object"""
+        pass
+
+
+class SupabaseStorage(StorageBackend):
+    """Supabase Storage bucket backend"""
+
+    def __init__(self, client=None, bucket: Optional[str] = None):
+        if client is None:
+            from app.core.database import get_supabase_admin
+            client = get_supabase_admin()
+        self.client = client
+        self.bucket = bucket or settings.STORAGE_BUCKET
+
+    @property
+    def backend_type(self) -> str:
+        return "supabase"
+
+    def _bucket(self):
+        return self.client.storage.from_(self.bucket)
+
+    def upload(
+        self,
+        path: str,
+        content: bytes,
+        content_type: str,
+        upsert: bool = False
+    ) -> None:
+        file_options = {"content-type": content_type}
+        if upsert:
+            file_options["upsert"] = "true"
+        self._bucket().upload(path, content, file_options)
+
+    def get(self, path: str) -> bytes:
+        return self._bucket().download(path)
+
+    def stream(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        # Supabase Storage downloads are buffered; chunk for a uniform API
+        content = self.get(path)
+        for offset in range(0, len(content), chunk_size):
+            yield content[offset:offset + chunk_size]
+
+    def remove(self, paths: List[str]) -> None:
+        if paths:
+            self._bucket().remove(paths)
+
+    def list(self, prefix: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[StorageObject]]:
+        folders = [prefix.strip("/")]
+        while folders:
+            folder = folders.pop()
+            offset = 0
+            while True:
+                entries = self._bucket().list(
+                    folder,
+                    {"limit": page_size, "offset": offset, "sortBy": {"column": "name", "order": "asc"}}
+                )
+                page = []
+                for entry in entries:
+                    path = f"{folder}/{entry['name']}" if folder else entry["name"]
+                    # Folders are listed as entries without an id
+                    if entry.get("id") is None:
+                        folders.append(path)
+                    else:
+                        updated_at = entry.get("updated_at") or entry.get("created_at")
+                        page.append(StorageObject(
+                            path=path,
+                            updated_at=datetime.fromisoformat(updated_at.replace("Z", "+00:00")) if updated_at else None
+                        ))
+                if page:
+                    yield page
+                if len(entries) < page_size:
+                    break
+                offset += page_size
+
+    def create_signed_url(self, path: str, expires_in: int) -> str:
+        return self._bucket().create_signed_url(path, expires_in)["signedURL"]
+
+    def get_public_url(self, path: str) -> str:
+        return self._bucket().get_public_url(path)
+
+
+class LocalStorage(StorageBackend):
+    """
+    Local filesystem backend
+
+    Objects live under ``root`` and are served by ``/api/v1/storage/{path}``.
+    Signed URLs carry an expiry and an HMAC of the path keyed by SECRET_KEY;
+    objects under ``SIGNED_PREFIXES`` are only served with a valid one.
+    """
+
+    def __init__(self, root: Optional[str] = None, base_url: Optional[str] = None):
+        self.root = Path(root or settings.STORAGE_LOCAL_ROOT).resolve()
+        self.base_url = (base_url if base_url is not None else settings.STORAGE_PUBLIC_URL).rstrip("/")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def backend_type(self) -> str:
+        return "local"
+
+    def resolve(self, path: str) -> Path:
+        """Map an object path to a file under root, rejecting traversal"""
+        full_path = (self.root / path.lstrip("/")).resolve()
+        if full_path == self.root or self.root not in full_path.parents:
+            raise StorageException(f"Invalid storage path: {path}")
+        return full_path
+
+    def upload(
+        self,
+        path: str,
+        content: bytes,
+        content_type: str,
+        upsert: bool = False
+    ) -> None:
+        full_path = self.resolve(path)
+        if full_path.exists() and not upsert:
+            raise StorageException(f"Object already exists: {path}")
+
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file and rename so readers never see partial objects
+        fd, tmp_path = tempfile.mkstemp(dir=full_path.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, full_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def get(self, path: str) -> bytes:
+        full_path = self.resolve(path)
+        if not full_path.is_file():
+            raise NotFoundException("Object", path)
+        return full_path.read_bytes()
+
+    def stream(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        full_path = self.resolve(path)
+        if not full_path.is_file():
+            raise NotFoundException("Object", path)
+        with open(full_path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def remove(self, paths: List[str]) -> None:
+        for path in paths:
+            try:
+                self.resolve(path).unlink()
+            except FileNotFoundError:
+                pass
+
+    def list(self, prefix: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[StorageObject]]:
+        base = self.root / prefix.strip("/") if prefix.strip("/") else self.root
+        page = []
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.startswith(".upload-"):
+                    continue
+                full_path = Path(dirpath) / filename
+                page.append(StorageObject(
+                    path=full_path.relative_to(self.root).as_posix(),
+                    updated_at=datetime.fromtimestamp(full_path.stat().st_mtime, tz=timezone.utc)
+                ))
+                if len(page) >= page_size:
+                    yield page
+                    page = []
+        if page:
+            yield page
+
+    def requires_signature(self, path: str) -> bool:
+        """Whether the object is private (served only through a signed URL)"""
+        return path.lstrip("/").startswith(SIGNED_PREFIXES)
+
+    def sign(self, path: str, expires: int) -> str:
+        """HMAC signature for a path and expiry timestamp"""
+        message = f"{path}:{expires}".encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+    def verify_signature(self, path: str, expires: int, signature: str) -> bool:
+        """Check a signed URL's signature and expiry"""
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self.sign(path, expires), signature)
+
+    def create_signed_url(self, path: str, expires_in: int) -> str:
+        expires = int(time.time()) + expires_in
+        query = urlencode({"expires": expires, "signature": self.sign(path, expires)})
+        return f"{self.get_public_url(path)}?{query}"
+
+    def get_public_url(self, path: str) -> str:
+        return f"{self.base_url}/api/v1/storage/{quote(path)}"
+
+
+_storage: StorageBackend = None
+
+
+def get_storage() -> StorageBackend:
+    """Get the configured storage backend"""
+    global _storage
+    if _storage is None:
+        backend = settings.STORAGE_BACKEND.lower()
+        if backend == "supabase":
+            _storage = SupabaseStorage()
+        elif backend == "local":
+            _storage = LocalStorage()
+        else:
+            raise ValueError(f"Unknown storage backend: {settings.STORAGE_BACKEND}")
+        logger.info(f"Using {backend} storage backend")
+    return _storage
@@ -1,13 +1,18 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, Response
 from contextlib import asynccontextmanager
 import logging
 
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.core.compression import CompressionMiddleware
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.db_instrumentation import QueryTrackingMiddleware
 from app.core.exceptions import FestWishException
+from app.core.http_cache import NotModified
 from app.api import api_router
+from app.services.delivery_worker import DeliveryWorkerPool
 
 
 @asynccontextmanager
@@ -15,17 +20,24 @@ async def lifespan(app: FastAPI):
     setup_logging()
     logger = logging.getLogger(__name__)
     logger.info(f"Starting {settings.APP_NAME}")
+    delivery_workers = DeliveryWorkerPool()
+    delivery_workers.start()
     yield
     logger.info(f"Shutting down {settings.APP_NAME}")
+    await delivery_workers.stop()
 
 
 app = FastAPI(
     title=settings.APP_NAME,
     description="Festival Wishing Platform API",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
+# Compress larger responses (pre-compressed catalog bodies pass through)
+app.add_middleware(CompressionMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -35,6 +47,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Database round-trips per request
+app.add_middleware(QueryTrackingMiddleware)
+
+# Request metrics (outermost, so timings and sizes cover the whole stack)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 
 # Global exception handler
 @app.exception_handler(FestWishException)
@@ -45,6 +64,11 @@ async def festwish_exception_handler(request: Request, exc: FestWishException):
     )
 
 
+@app.exception_handler(NotModified)
+async def not_modified_handler(request: Request, exc: NotModified):
+    return Response(status_code=304, headers=exc.headers)
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger = logging.getLogger(__name__)
@@ -71,3 +95,9 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
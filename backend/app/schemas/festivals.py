@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from typing import List, Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import date, datetime
 
 
 class FestivalQuote(BaseModel):
@@ -33,11 +33,12 @@ class FestivalBase(BaseModel):
 
 
 class Festival(FestivalBase):
+    """Festival projected to the requested ?fields= (id, name and slug always present)"""
     id: UUID
-    is_active: bool = True
+    is_active: Optional[bool] = None
     seo_title: Optional[str] = None
     seo_description: Optional[str] = None
-    created_at: datetime
+    created_at: Optional[datetime] = None
     image: Optional[FestivalImage] = None  # First/primary image for list views
     
     class Config:
@@ -57,6 +58,29 @@ class FestivalList(BaseModel):
     total: int
 
 
+class FestivalSearchHit(Festival):
+    score: float
+
+
+class FestivalSearchResults(BaseModel):
+    query: str
+    results: List[FestivalSearchHit]
+    total: int
+
+
+class UpcomingFestival(Festival):
+    starts_on: date
+    ends_on: date
+    exact_dates: bool  # False when estimated from typical_month
+
+
+class UpcomingFestivals(BaseModel):
+    from_date: date
+    to_date: date
+    festivals: List[UpcomingFestival]
+    total: int
+
+
 class RandomContent(BaseModel):
     message: Optional[dict] = None
     quote: Optional[FestivalQuote] = None
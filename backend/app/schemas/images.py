@@ -15,3 +15,4 @@ class ImageUploadResponse(BaseModel):
 class ImageList(BaseModel):
     images: List[ImageUploadResponse]
     total: int
+    next_cursor: Optional[str] = None
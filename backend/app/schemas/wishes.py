@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 
@@ -11,6 +11,8 @@ class WishCreate(BaseModel):
     custom_message: Optional[str] = None
     user_image_id: Optional[UUID] = None
     channel_type: str = "download"
+    recipient_contact: Optional[str] = None  # Phone number or email for sending channels
+    scheduled_at: Optional[datetime] = None  # Deliver at this time instead of immediately
 
 
 class WishPreview(BaseModel):
@@ -23,6 +25,11 @@ class WishPreview(BaseModel):
     recipient_name: Optional[str] = None
 
 
+class WishPreviewBatch(BaseModel):
+    previews: List[WishPreview]
+    total: int
+
+
 class GeneratedWish(BaseModel):
     id: UUID
     festival_id: UUID
@@ -32,6 +39,7 @@ class GeneratedWish(BaseModel):
     generated_card_url: Optional[str] = None
     channel_type: Optional[str] = None
     sent_status: str = "pending"
+    scheduled_at: Optional[datetime] = None
     created_at: datetime
     
     class Config:
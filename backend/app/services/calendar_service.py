@@ -0,0 +1,149 @@
+"""
+Festival Calendar
+-----------------
+Answers "which festivals fall in the next N days" from a sorted in-memory
+list of occurrences built from the catalog.
+
+A festival's occurrence in a year comes from ``festival_dates`` when a row
+exists for that year, otherwise from its ``typical_month`` text
+("October-November" spans 1 October to 30 November). Festivals with neither
+(e.g. "Lunar Calendar" and no dates) are left out.
+"""
+
+from bisect import bisect_left, bisect_right
+from calendar import month_abbr, month_name, monthrange
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+import re
+
+from app.services.catalog_service import CatalogSnapshot
+
+logger = logging.getLogger(__name__)
+
+_MONTHS = {
+    **{name.lower(): number for number, name in enumerate(month_name) if name},
+    **{name.lower(): number for number, name in enumerate(month_abbr) if name},
+    "sept": 9,
+}
+_MONTH_SEPARATOR = re.compile(r"\s*(?:-|–|/|\bto\b)\s*")
+
+
+def parse_typical_month(text: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(first month, last month) from text like "October-November", or None"""
+    if not text:
+        return None
+    parts = [p for p in _MONTH_SEPARATOR.split(text.strip().lower()) if p]
+    months = [_MONTHS.get(p) for p in parts]
+    if not months or None in months or len(months) > 2:
+        return None
+    return months[0], months[-1]
+
+
+def _month_span(year: int, months: Tuple[int, int]) -> Tuple[date, date]:
+    first, last = months
+    # "December-January" ends in the next year
+    end_year = year + 1 if last < first else year
+    return date(year, first, 1), date(end_year, last, monthrange(end_year, last)[1])
+
+
+@dataclass(frozen=True)
+class Occurrence:
+    starts_on: date
+    ends_on: date
+    festival_id: str
+    exact: bool  # From festival_dates rather than typical_month
+
+
+class CalendarIndex:
+    """Occurrences for a range of years, sorted by start date"""
+
+    def __init__(self, version: str, years: range, occurrences: List[Occurrence]):
+        self.version = version
+        self.years = years
+        self.occurrences = sorted(occurrences, key=lambda o: (o.starts_on, o.festival_id))
+        self.starts = [o.starts_on for o in self.occurrences]
+        # Longest occurrence bounds how far back an overlapping one can start
+        self.max_span = max((o.ends_on - o.starts_on for o in self.occurrences), default=timedelta(0))
+
+    @classmethod
+    def build(cls, catalog: CatalogSnapshot, years: range) -> "CalendarIndex":
+        exact: Dict[Tuple[str, int], List[Occurrence]] = {}
+        for row in catalog.dates:
+            if row["festival_id"] not in catalog.festivals_by_id:
+                continue
+            starts_on = date.fromisoformat(str(row["starts_on"]))
+            occurrence = Occurrence(starts_on, date.fromisoformat(str(row["ends_on"])), row["festival_id"], True)
+            exact.setdefault((row["festival_id"], starts_on.year), []).append(occurrence)
+
+        occurrences = []
+        unplaced = 0
+        for festival in catalog.festivals:
+            months = parse_typical_month(festival.get("typical_month"))
+            for year in years:
+                dated = exact.get((festival["id"], year))
+                if dated:
+                    occurrences.extend(dated)
+                elif months:
+                    occurrences.append(Occurrence(*_month_span(year, months), festival["id"], False))
+            if not months and not any((festival["id"], year) in exact for year in years):
+                unplaced += 1
+
+        if unplaced:
+            logger.info(f"{unplaced} festivals have no dates or parseable typical_month")
+        return cls(catalog.version, years, occurrences)
+
+    def between(self, start: date, end: date) -> List[Occurrence]:
+        """Occurrences overlapping [start, end], the earliest per festival, by start date"""
+        lo = bisect_left(self.starts, start - self.max_span)
+        hi = bisect_right(self.starts, end)
+        seen = set()
+        results = []
+        for occurrence in self.occurrences[lo:hi]:
+            if occurrence.ends_on >= start and occurrence.festival_id not in seen:
+                seen.add(occurrence.festival_id)
+                results.append(occurrence)
+        return results
+
+
+class FestivalCalendar:
+    """Keeps the calendar index in step with the catalog version and the year"""
+
+    def __init__(self):
+        self._index: Optional[CalendarIndex] = None
+
+    def index_for(self, catalog: CatalogSnapshot, today: date) -> CalendarIndex:
+        """Index covering last year to next year, rebuilt on version or year change"""
+        years = range(today.year - 1, today.year + 2)
+        if self._index is None or self._index.version != catalog.version or self._index.years != years:
+            self._index = CalendarIndex.build(catalog, years)
+        return self._index
+
+    def upcoming(
+        self,
+        catalog: CatalogSnapshot,
+        days: int,
+        fields: Sequence[str],
+        today: Optional[date] = None
+    ) -> List[dict]:
+        """Festivals taking place within the next days, projected to fields, soonest first"""
+        today = today or date.today()
+        occurrences = self.index_for(catalog, today).between(today, today + timedelta(days=days))
+        rows = catalog.festival_list(fields, [catalog.festivals_by_id[o.festival_id] for o in occurrences])
+        for row, occurrence in zip(rows, occurrences):
+            row["starts_on"] = occurrence.starts_on
+            row["ends_on"] = occurrence.ends_on
+            row["exact_dates"] = occurrence.exact
+        return rows
+
+    def festival_ids_within(self, catalog: CatalogSnapshot, days: int, today: Optional[date] = None) -> List[str]:
+        """Ids of festivals taking place within the next days, soonest first"""
+        today = today or date.today()
+        return [
+            o.festival_id
+            for o in self.index_for(catalog, today).between(today, today + timedelta(days=days))
+        ]
+
+
+festival_calendar = FestivalCalendar()
@@ -3,18 +3,21 @@ from uuid import UUID, uuid4
 from PIL import Image, ImageDraw, ImageFont
 from io import BytesIO
 import httpx
-from app.core.database import get_supabase_admin
-from app.core.config import settings
+from app.core.storage import get_storage
 from app.core.exceptions import StorageException
+from app.core.metrics import registry
 import logging
 
 logger = logging.getLogger(__name__)
 
+renders_in_flight = registry.gauge(
+    "festwish_card_renders_in_flight", "Greeting cards currently being rendered"
+)
+
 
 class CardService:
     def __init__(self):
-        self.client = get_supabase_admin()
-        self.bucket = settings.STORAGE_BUCKET
+        self.storage = get_storage()
     
     async def generate_card(
         self,
@@ -26,6 +29,7 @@ class CardService:
         output_height: int = 1350
     ) -> bytes:
         """Generate a greeting card with text overlay"""
+        renders_in_flight.inc()
         try:
             # Download background image
             async with httpx.AsyncClient() as client:
@@ -116,6 +120,8 @@ class CardService:
         except Exception as e:
             logger.error(f"Failed to generate card: {e}")
             raise StorageException(f"Failed to generate card: {str(e)}")
+        finally:
+            renders_in_flight.dec()
     
     def _wrap_text(
         self,
@@ -160,23 +166,18 @@ class CardService:
             
             # Delete existing card if it exists
             try:
-                self.client.storage.from_(self.bucket).remove([storage_path])
+                self.storage.remove([storage_path])
             except:
                 pass  # Ignore if file doesn't exist
             
             # Upload new card
-            self.client.storage.from_(self.bucket).upload(
-                storage_path,
-                card_bytes,
-                {"content-type": "image/jpeg"}
-            )
+            self.storage.upload(storage_path, card_bytes, "image/jpeg")
             
             # Generate signed URL (valid for 1 year)
-            signed_result = self.client.storage.from_(self.bucket).create_signed_url(
+            card_url = self.storage.create_signed_url(
                 storage_path,
                 86400 * 365  # 1 year in seconds
             )
-            card_url = signed_result['signedURL']
             
             return card_url
             
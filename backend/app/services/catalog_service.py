@@ -0,0 +1,266 @@
+"""
+Catalog Cache
+-------------
+In-memory snapshot of the festival catalog: festivals, their quotes, images
+and dates, and relationships. This content changes a few times a year, so it
+is loaded in bulk and refreshed in the background once older than
+``CATALOG_CACHE_TTL_SECONDS``.
+
+Every snapshot carries a ``version``: a digest of its content. Any two
+processes that loaded the same data agree on it, which makes it usable as
+an HTTP validator (ETag). Response bodies derived from a snapshot are
+encoded once and kept on it, so they live exactly as long as the version.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+import orjson
+
+from app.core.compression import compress
+from app.core.config import settings
+from app.core.database import get_supabase_admin
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+def _group_by(rows: List[dict], key: str) -> Dict[str, List[dict]]:
+    """Rows grouped by a column, skipping rows where it is empty"""
+    groups: Dict[str, List[dict]] = defaultdict(list)
+    for row in rows:
+        if row.get(key):
+            groups[row[key]].append(row)
+    return dict(groups)
+
+
+@dataclass
+class CacheStats:
+    """Lookup counters shared by every snapshot of one cache"""
+    hits: int = 0
+    misses: int = 0
+
+
+@dataclass
+class CatalogSnapshot:
+    """An immutable view of the catalog at one version"""
+    version: str
+    festivals: List[dict]
+    relationships: List[dict]
+    quotes: List[dict]
+    images: List[dict]
+    dates: List[dict] = field(default_factory=list)
+    loaded_at: float = field(default_factory=time.monotonic)
+    stats: CacheStats = field(default_factory=CacheStats, repr=False)
+    # Secondary indexes, built once per version (lists keep catalog order)
+    festivals_by_id: Dict[str, dict] = field(init=False, repr=False)
+    festivals_by_slug: Dict[str, dict] = field(init=False, repr=False)
+    festivals_by_culture: Dict[str, List[dict]] = field(init=False, repr=False)
+    festivals_by_month: Dict[str, List[dict]] = field(init=False, repr=False)
+    quotes_by_festival: Dict[str, List[dict]] = field(init=False, repr=False)
+    images_by_festival: Dict[str, List[dict]] = field(init=False, repr=False)
+    relationships_by_id: Dict[str, dict] = field(init=False, repr=False)
+    relationships_by_category: Dict[str, List[dict]] = field(init=False, repr=False)
+    categories: List[str] = field(init=False, repr=False)
+    _encoded: Dict[str, bytes] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        self.festivals_by_id = {f["id"]: f for f in self.festivals}
+        self.festivals_by_slug = {f["slug"]: f for f in self.festivals}
+        self.festivals_by_culture = _group_by(self.festivals, "religion_culture")
+        self.festivals_by_month = _group_by(self.festivals, "typical_month")
+        self.quotes_by_festival = _group_by(self.quotes, "festival_id")
+        self.images_by_festival = _group_by(self.images, "festival_id")
+        self.relationships_by_id = {r["id"]: r for r in self.relationships}
+        self.relationships_by_category = _group_by(self.relationships, "category")
+        self.categories = sorted(self.relationships_by_category)
+
+    def festival_list(self, fields: Sequence[str], festivals: Optional[List[dict]] = None) -> List[dict]:
+        """Festivals (all by default) projected to fields; "image" is each festival's first image"""
+        rows = []
+        for festival in self.festivals if festivals is None else festivals:
+            row = {f: festival[f] for f in fields if f in festival}
+            if "image" in fields:
+                images = self.images_by_festival.get(festival["id"])
+                row["image"] = images[0] if images else None
+            rows.append(row)
+        return rows
+
+    def festival_detail(self, festival_id: str) -> Optional[dict]:
+        """Festival with its quotes and images, or None if not in the catalog"""
+        festival = self.festivals_by_id.get(festival_id)
+        if festival is None:
+            return None
+        return {
+            **festival,
+            "quotes": self.quotes_by_festival.get(festival_id, []),
+            "images": self.images_by_festival.get(festival_id, []),
+        }
+
+    def encoded(self, key: str, build: Callable[[], Any]) -> bytes:
+        """JSON bytes for a response body, built on first use for this version"""
+        payload = self._encoded.get(key)
+        if payload is None:
+            self.stats.misses += 1
+            payload = self._encoded[key] = orjson.dumps(build())
+        else:
+            self.stats.hits += 1
+        return payload
+
+    def precompressed(self, key: str, encoding: str) -> Optional[bytes]:
+        """The compressed() body if it has already been built, else None"""
+        return self._encoded.get(f"{key}|{encoding}")
+
+    def compressed(self, key: str, encoding: str) -> bytes:
+        """
+        A body from encoded(), compressed once per version and encoding.
+        Compresses at the best level, so call it from a worker thread.
+        """
+        variant = f"{key}|{encoding}"
+        payload = self._encoded.get(variant)
+        if payload is None:
+            payload = self._encoded[variant] = compress(self._encoded[key], encoding, best=True)
+        return payload
+
+
+class CatalogCache:
+    """Loads catalog snapshots and keeps the current one fresh"""
+
+    def __init__(self, client=None, ttl_seconds: Optional[float] = None):
+        self._client = client
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.CATALOG_CACHE_TTL_SECONDS
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self.stats = CacheStats()
+        self._load_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[CatalogSnapshot], None]] = []
+        self._notify_task: Optional[asyncio.Task] = None
+        self._notified_on: Optional[date] = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_supabase_admin()
+        return self._client
+
+    def _fetch_all(self, build_query: Callable[[], Any]) -> List[dict]:
+        """Every row of a query, in pages: PostgREST cuts a single read off at max-rows"""
+        page_size = settings.CATALOG_PAGE_SIZE
+        rows: List[dict] = []
+        while True:
+            # Builders accumulate parameters, so each page gets a fresh one
+            page = build_query().range(len(rows), len(rows) + page_size - 1).execute().data
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+
+    def _fetch(self) -> Dict[str, List[dict]]:
+        """Read every active catalog row, paging through each table"""
+        def active(table: str, order: str) -> List[dict]:
+            # The order must be total for pages to line up
+            return self._fetch_all(
+                lambda: self.client.table(table).select("*").eq("is_active", True).order(order)
+            )
+
+        return {
+            "festivals": active("festivals", "name,id"),
+            "relationships": active("relationships", "sort_order,id"),
+            "quotes": active("festival_quotes", "created_at,id"),
+            "images": active("festival_images", "created_at,id"),
+            "dates": self._fetch_all(
+                lambda: self.client.table("festival_dates")
+                .select("festival_id,starts_on,ends_on")
+                .order("starts_on,festival_id")
+            ),
+        }
+
+    def on_load(self, listener: Callable[[CatalogSnapshot], None]) -> None:
+        """
+        Call listener (in a worker thread) with every new snapshot version, e.g. to
+        pre-encode bodies, and again on the first load of each day so date-dependent
+        work (the calendar prewarm) moves with the calendar. Listeners must tolerate
+        being called more than once per version.
+        """
+        self._listeners.append(listener)
+
+    @staticmethod
+    def compute_version(data: Dict[str, List[dict]]) -> str:
+        """Content digest of the catalog rows"""
+        encoded = json.dumps(data, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode()).hexdigest()[:20]
+
+    async def load(self) -> CatalogSnapshot:
+        """Load a fresh snapshot and make it current"""
+        data = await asyncio.to_thread(self._fetch)
+        version = self.compute_version(data)
+
+        if self._snapshot is not None and self._snapshot.version == version:
+            # Unchanged: keep the existing snapshot (and anything derived from it)
+            self._snapshot.loaded_at = time.monotonic()
+            if self._notified_on != date.today():
+                self._start_notify()
+            return self._snapshot
+
+        self._snapshot = CatalogSnapshot(version=version, stats=self.stats, **data)
+        logger.info(
+            f"Loaded catalog version {version}: {len(data['festivals'])} festivals, "
+            f"{len(data['relationships'])} relationships"
+        )
+        self._start_notify()
+        return self._snapshot
+
+    def _start_notify(self) -> None:
+        self._notified_on = date.today()
+        if self._listeners:
+            # In the background: the first request must not wait for pre-warming
+            self._notify_task = asyncio.create_task(self._notify(self._snapshot))
+
+    async def _notify(self, snapshot: CatalogSnapshot) -> None:
+        for listener in self._listeners:
+            try:
+                await asyncio.to_thread(listener, snapshot)
+            except Exception as e:
+                logger.error(f"Catalog load listener {listener.__qualname__} failed: {e}")
+
+    async def _refresh(self) -> None:
+        try:
+            await self.load()
+        except Exception as e:
+            logger.error(f"Catalog refresh failed, serving version {self._snapshot.version}: {e}")
+
+    async def get(self) -> CatalogSnapshot:
+        """Current snapshot; stale snapshots are served while a refresh runs"""
+        if self._snapshot is None:
+            async with self._load_lock:
+                if self._snapshot is None:
+                    await self.load()
+            return self._snapshot
+
+        if time.monotonic() - self._snapshot.loaded_at > self.ttl_seconds and (
+            self._refresh_task is None or self._refresh_task.done()
+        ):
+            self._refresh_task = asyncio.create_task(self._refresh())
+
+        return self._snapshot
+
+    def invalidate(self) -> None:
+        """Force the next get() to start a refresh"""
+        if self._snapshot is not None:
+            self._snapshot.loaded_at = 0.0
+
+
+catalog_cache = CatalogCache()
+
+registry.register_cache("catalog", lambda: (catalog_cache.stats.hits, catalog_cache.stats.misses))
+
+
+async def get_catalog() -> CatalogSnapshot:
+    """Get the current catalog snapshot"""
+    return await catalog_cache.get()
@@ -0,0 +1,217 @@
+"""
+Channel Guard
+-------------
+Rate limiting and circuit breaking around ``MessageChannel.send``.
+
+Providers enforce send rates and go down from time to time. Every channel
+handed out by ``MessageChannelFactory`` is wrapped in a ``GuardedChannel``
+that:
+
+- smooths bursts to the provider rate with a FIFO token bucket
+- rejects sends immediately once too many are already queued
+- stops calling a failing provider (circuit open) and probes it again
+  after a cool-down (half-open)
+"""
+
+from typing import Optional
+import asyncio
+import logging
+import time
+
+from app.services.messaging import MessageChannel, SendResult, WishContent
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a rate limiter already has its maximum number of waiters"""
+    pass
+
+
+class TokenBucket:
+    """
+    Async token bucket: ``rate`` tokens per second, up to ``burst`` saved.
+
+    Waiters are served in arrival order. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, max_waiters: int = 1000):
+        self.rate = rate
+        self.burst = burst or max(rate, 1.0)
+        self.max_waiters = max_waiters
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._waiters = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def waiting(self) -> int:
+        """Number of callers queued for a token"""
+        return self._waiters
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait for a token, or raise QueueFullError if the queue is full"""
+        if self.rate <= 0:
+            return
+        if self._waiters >= self.max_waiters:
+            raise QueueFullError(f"{self._waiters} sends already waiting")
+
+        self._waiters += 1
+        try:
+            async with self._lock:
+                self._refill()
+                while self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+                    self._refill()
+                self._tokens -= 1
+        finally:
+            self._waiters -= 1
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open after a cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> Optional[str]:
+        """
+        The slot a call may go through on now, or None if it may not.
+
+        CLOSED is an ordinary call; HALF_OPEN means this call holds the single
+        probe slot and must hand it back through release() or record_*().
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return self.CLOSED
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            # Let a single probe through to test the provider
+            self._probe_in_flight = True
+            return self.HALF_OPEN
+        return None
+
+    def release(self, slot: str) -> None:
+        """Give back a call slot that got no verdict from the provider"""
+        if slot == self.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def record_success(self, slot: str) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self, slot: str) -> None:
+        self._failures += 1
+        if slot == self.HALF_OPEN:
+            self._probe_in_flight = False
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                logger.warning(f"Circuit opened after {self._failures} consecutive failures")
+            self._opened_at = time.monotonic()
+
+
+class GuardedChannel(MessageChannel):
+    """A MessageChannel wrapped with a rate limiter and a circuit breaker"""
+
+    def __init__(
+        self,
+        channel: MessageChannel,
+        rate_limiter: TokenBucket,
+        circuit_breaker: CircuitBreaker
+    ):
+        self.channel = channel
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self._in_flight = 0
+
+    @property
+    def channel_type(self) -> str:
+        return self.channel.channel_type
+
+    @property
+    def is_stub(self) -> bool:
+        return self.channel.is_stub
+
+    @property
+    def tripped(self) -> bool:
+        """Whether the provider is currently considered down"""
+        return self.circuit_breaker.state == CircuitBreaker.OPEN
+
+    async def send(
+        self,
+        recipient: str,
+        content: WishContent
+    ) -> SendResult:
+        """Send through the wrapped channel unless throttled or tripped"""
+        slot = self.circuit_breaker.allow()
+        if slot is None:
+            return SendResult(
+                success=False,
+                error=f"{self.channel_type} provider is unavailable (circuit open)"
+            )
+
+        settled = False
+        try:
+            try:
+                await self.rate_limiter.acquire()
+            except QueueFullError as e:
+                return SendResult(
+                    success=False,
+                    error=f"{self.channel_type} send queue is full: {e}"
+                )
+
+            self._in_flight += 1
+            try:
+                result = await self.channel.send(recipient, content)
+            except Exception as e:
+                logger.error(f"{self.channel_type} provider error: {e}")
+                self.circuit_breaker.record_failure(slot)
+                settled = True
+                return SendResult(success=False, error=str(e))
+            finally:
+                self._in_flight -= 1
+
+            self.circuit_breaker.record_success(slot)
+            settled = True
+            return result
+        finally:
+            if not settled:
+                # Queue full or cancelled (send_bulk cancels on early exit):
+                # the provider gave no verdict, so hand back a probe slot we hold
+                self.circuit_breaker.release(slot)
+
+    async def is_available(self) -> bool:
+        """Available when configured and the circuit is not open"""
+        if self.tripped:
+            return False
+        return await self.channel.is_available()
+
+    def metrics(self) -> dict:
+        """Queue depth and breaker state for monitoring"""
+        return {
+            "queue_depth": self.rate_limiter.waiting,
+            "in_flight": self._in_flight,
+            "circuit_state": self.circuit_breaker.state,
+            "rate_limit": self.rate_limiter.rate
+        }
@@ -0,0 +1,169 @@
+"""
+Scheduled Delivery
+------------------
+Wishes created with a future ``scheduled_at`` sit in ``wish_outbox`` with
+status ``scheduled``. The ``DeliveryScheduler`` loads those coming due
+within a look-ahead horizon in batches, keeps them in a min-heap keyed by
+release time, and flips them to ``pending`` for the delivery workers when
+their time comes.
+
+Loading resumes from a high-water mark, the last ``(next_attempt_at, id)``
+loaded, so each poll only reads rows that came due since the previous one,
+plus any created since then with an earlier time. The mark starts over
+whenever the heap runs empty.
+
+Release times are spread over ``DELIVERY_SPREAD_SECONDS`` after the
+requested time, so a midnight Diwali or New Year spike reaches the workers
+and providers as a steady stream. Each delivery's offset is derived from
+its id, so every scheduler instance agrees on it.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import heapq
+import logging
+import time
+
+from app.core.config import settings
+from app.services.delivery_worker import OutboxStore
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryScheduler:
+    """Min-heap of upcoming deliveries released in spread-out batches"""
+
+    def __init__(
+        self,
+        store: Optional[OutboxStore] = None,
+        horizon_seconds: Optional[float] = None,
+        spread_seconds: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        poll_interval: Optional[float] = None
+    ):
+        self.store = store or OutboxStore()
+        self.horizon_seconds = horizon_seconds if horizon_seconds is not None else settings.DELIVERY_SCHEDULER_HORIZON_SECONDS
+        self.spread_seconds = spread_seconds if spread_seconds is not None else settings.DELIVERY_SPREAD_SECONDS
+        self.batch_size = batch_size or settings.DELIVERY_BATCH_SIZE
+        self.max_queued = max_queued or settings.DELIVERY_SCHEDULER_MAX_QUEUED
+        self.poll_interval = poll_interval or settings.DELIVERY_POLL_INTERVAL_SECONDS
+        # (release_at epoch seconds, outbox id)
+        self._heap: List[Tuple[float, str]] = []
+        self._queued: Set[str] = set()
+        # Last (next_attempt_at, id) loaded, and the newest created_at seen
+        self._high_water: Optional[Tuple[str, str]] = None
+        self._newest_created: Optional[datetime] = None
+
+    @property
+    def queued(self) -> int:
+        """Deliveries loaded and waiting for their release time"""
+        return len(self._heap)
+
+    def spread_offset(self, outbox_id: str) -> float:
+        """Stable offset in [0, spread_seconds) for a delivery"""
+        if self.spread_seconds <= 0:
+            return 0.0
+        digest = hashlib.blake2b(outbox_id.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big") / 2 ** 64 * self.spread_seconds
+
+    @staticmethod
+    def _parse_time(value: str) -> datetime:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+    def _push(self, row: dict) -> bool:
+        """Queue one loaded row unless it is already queued"""
+        if row["id"] in self._queued:
+            return False
+        release_at = self._parse_time(row["next_attempt_at"]).timestamp() + self.spread_offset(row["id"])
+        heapq.heappush(self._heap, (release_at, row["id"]))
+        self._queued.add(row["id"])
+        if row.get("created_at"):
+            created_at = self._parse_time(row["created_at"])
+            if self._newest_created is None or created_at > self._newest_created:
+                self._newest_created = created_at
+        return True
+
+    async def _load_pages(
+        self,
+        due_before: datetime,
+        after: Optional[Tuple[str, str]],
+        created_after: Optional[datetime] = None
+    ) -> Tuple[int, Optional[Tuple[str, str]]]:
+        """Queue pages of scheduled rows, returning how many were added and the last row read"""
+        added = 0
+        while len(self._heap) < self.max_queued:
+            rows = await self.store.load_scheduled(due_before, after, self.batch_size, created_after)
+            for row in rows:
+                added += self._push(row)
+            if rows:
+                after = (rows[-1]["next_attempt_at"], rows[-1]["id"])
+            if len(rows) < self.batch_size:
+                break
+        return added, after
+
+    async def load(self) -> int:
+        """Queue scheduled deliveries due within the horizon, returning how many were added"""
+        due_before = datetime.now(timezone.utc) + timedelta(seconds=self.horizon_seconds)
+        added = 0
+
+        if not self._heap:
+            # Nothing left in flight: rescan from the start to pick up anything missed
+            self._high_water = None
+        elif self._high_water and self._newest_created:
+            # Created since the last load but due before the mark
+            added, _ = await self._load_pages(
+                self._parse_time(self._high_water[0]), None, self._newest_created
+            )
+
+        loaded, self._high_water = await self._load_pages(due_before, self._high_water)
+        return added + loaded
+
+    async def release_due(self) -> int:
+        """Hand deliveries whose release time has passed to the workers"""
+        now = time.time()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, outbox_id = heapq.heappop(self._heap)
+            due.append(outbox_id)
+
+        for start in range(0, len(due), self.batch_size):
+            batch = due[start:start + self.batch_size]
+            try:
+                await self.store.release(batch)
+            except Exception:
+                # Put the batch back so the next tick retries it
+                for outbox_id in batch:
+                    heapq.heappush(self._heap, (now, outbox_id))
+                raise
+            self._queued.difference_update(batch)
+
+        return len(due)
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """Load and release deliveries until stopped"""
+        next_load = 0.0
+        while not stop_event.is_set():
+            try:
+                if time.monotonic() >= next_load:
+                    added = await self.load()
+                    if added:
+                        logger.info(f"Scheduled {added} deliveries ({self.queued} queued)")
+                    next_load = time.monotonic() + self.poll_interval
+
+                released = await self.release_due()
+                if released:
+                    logger.info(f"Released {released} scheduled deliveries")
+            except Exception as e:
+                logger.error(f"Delivery scheduler failed: {e}")
+
+            # Wake for the next release or the next load, whichever is first
+            timeout = self.poll_interval
+            if self._heap:
+                timeout = min(timeout, max(self._heap[0][0] - time.time(), 0.0))
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=max(timeout, 0.05))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,286 @@
+"""
+Wish Delivery Worker
+--------------------
+Drains the ``wish_outbox`` table. Rows are written by a database trigger in
+the same transaction as the ``generated_wishes`` insert, so a created wish
+is never lost between the request and delivery.
+
+Each worker claims a batch of due rows (``FOR UPDATE SKIP LOCKED`` with a
+lease), sends them through ``MessageChannelFactory.send_bulk`` and records
+all outcomes in one call. Wishes whose card was never generated get it
+rendered here first. Failures are retried with exponential backoff until
+``DELIVERY_MAX_ATTEMPTS``, after which the wish is marked failed; a wish
+for an unknown or unconfigured channel is marked failed straight away.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Collection, Dict, List, Optional, Tuple
+from uuid import uuid4
+import asyncio
+import logging
+import socket
+
+from app.core.config import settings
+from app.core.database import get_supabase_admin
+from app.services.messaging import MessageChannelFactory, WishContent
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxStore:
+    """Database access for the wish outbox"""
+
+    def __init__(self, client=None):
+        self.client = client or get_supabase_admin()
+
+    async def claim(self, worker_id: str, batch_size: int, lease_seconds: int) -> List[dict]:
+        """Claim up to batch_size due deliveries for a worker"""
+        result = await asyncio.to_thread(
+            self.client.rpc(
+                "claim_wish_outbox",
+                {
+                    "p_worker_id": worker_id,
+                    "p_batch_size": batch_size,
+                    "p_lease_seconds": lease_seconds
+                }
+            ).execute
+        )
+        return result.data or []
+
+    async def load_scheduled(
+        self,
+        due_before: datetime,
+        after: Optional[Tuple[str, str]],
+        limit: int,
+        created_after: Optional[datetime] = None
+    ) -> List[dict]:
+        """Page through scheduled deliveries due before a time, in (next_attempt_at, id) order"""
+        query = self.client.table("wish_outbox")\
+            .select("id, next_attempt_at, created_at")\
+            .eq("status", "scheduled")\
+            .lte("next_attempt_at", due_before.isoformat())
+
+        if after:
+            next_attempt_at, outbox_id = after
+            query = query.or_(
+                f'next_attempt_at.gt."{next_attempt_at}",'
+                f'and(next_attempt_at.eq."{next_attempt_at}",id.gt.{outbox_id})'
+            )
+        if created_after:
+            query = query.gt("created_at", created_after.isoformat())
+
+        # Renders as order=next_attempt_at,id
+        result = await asyncio.to_thread(
+            query.order("next_attempt_at,id").limit(limit).execute
+        )
+        return result.data or []
+
+    async def release(self, outbox_ids: List[str]) -> None:
+        """Make scheduled deliveries claimable by the workers now"""
+        await asyncio.to_thread(
+            self.client.table("wish_outbox")
+            .update({
+                "status": "pending",
+                "next_attempt_at": datetime.now(timezone.utc).isoformat()
+            })
+            .in_("id", outbox_ids)
+            .eq("status", "scheduled")
+            .execute
+        )
+
+    async def set_card_url(self, wish_id: str, card_url: str) -> None:
+        """Store a card rendered by a worker on its wish"""
+        await asyncio.to_thread(
+            self.client.table("generated_wishes")
+            .update({"generated_card_url": card_url})
+            .eq("id", wish_id)
+            .execute
+        )
+
+    async def complete(
+        self,
+        sent_ids: List[str],
+        failures: Dict[str, str],
+        permanent: Collection[str] = ()
+    ) -> None:
+        """Record sent deliveries, schedule retries for failures and give up on permanent ones"""
+        await asyncio.to_thread(
+            self.client.rpc(
+                "complete_wish_outbox",
+                {
+                    "p_sent": sent_ids,
+                    "p_failures": [
+                        {"id": id, "error": error, "permanent": id in permanent}
+                        for id, error in failures.items()
+                    ],
+                    "p_base_delay_seconds": settings.DELIVERY_RETRY_BASE_SECONDS,
+                    "p_max_delay_seconds": settings.DELIVERY_RETRY_MAX_SECONDS,
+                    "p_max_attempts": settings.DELIVERY_MAX_ATTEMPTS
+                }
+            ).execute
+        )
+
+
+class DeliveryWorker:
+    """Claims outbox batches and sends them through the message channels"""
+
+    def __init__(
+        self,
+        store: Optional[OutboxStore] = None,
+        worker_id: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        lease_seconds: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        card_service=None
+    ):
+        self.store = store or OutboxStore()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{uuid4().hex[:8]}"
+        self.batch_size = batch_size or settings.DELIVERY_BATCH_SIZE
+        self.lease_seconds = lease_seconds or settings.DELIVERY_LEASE_SECONDS
+        self.poll_interval = poll_interval or settings.DELIVERY_POLL_INTERVAL_SECONDS
+        self._card_service = card_service
+
+    @staticmethod
+    async def _channel_error(channel_type: str) -> Optional[str]:
+        """Why a channel can never deliver (unknown or unconfigured), or None"""
+        try:
+            MessageChannelFactory.get_channel(channel_type)
+        except ValueError as e:
+            return str(e)
+        if not await MessageChannelFactory.is_channel_configured(channel_type):
+            return f"{channel_type} channel is not configured"
+        return None
+
+    async def _render_card(self, row: dict) -> None:
+        """Render and store the card of a claimed wish that has none yet"""
+        from app.services.card_service import CardService
+
+        if self._card_service is None:
+            self._card_service = CardService()
+        try:
+            card_bytes = await self._card_service.generate_card(
+                background_image_url=row["background_image_url"],
+                message_text=row["final_message"],
+                recipient_name=row.get("recipient_name"),
+                quote_text=row.get("quote_text")
+            )
+            card_url = await self._card_service.save_card(card_bytes, row["wish_id"])
+            await self.store.set_card_url(row["wish_id"], card_url)
+        except Exception as e:
+            # Better a wish without its card than no wish at all
+            logger.warning(f"Could not render card for wish {row['wish_id']}: {e}")
+            return
+        row["generated_card_url"] = card_url
+
+    async def run_once(self) -> int:
+        """Claim and deliver one batch, returning the number of rows processed"""
+        rows = await self.store.claim(self.worker_id, self.batch_size, self.lease_seconds)
+        if not rows:
+            return 0
+
+        by_channel: Dict[str, List[dict]] = defaultdict(list)
+        for row in rows:
+            by_channel[row["channel_type"]].append(row)
+
+        outbox_ids = {row["wish_id"]: row["id"] for row in rows}
+        sent_ids: List[str] = []
+        failures: Dict[str, str] = {}
+        permanent = set()
+
+        for channel_type, channel_rows in by_channel.items():
+            error = await self._channel_error(channel_type)
+            if error:
+                for row in channel_rows:
+                    failures[row["id"]] = error
+                    permanent.add(row["id"])
+                continue
+
+            # The card is usually rendered by the client after the wish is
+            # created; render it here if the delivery got there first
+            await asyncio.gather(*(
+                self._render_card(row)
+                for row in channel_rows
+                if not row.get("generated_card_url") and row.get("background_image_url")
+            ))
+
+            deliveries = [
+                (
+                    row["recipient"],
+                    WishContent(
+                        recipient_name=row.get("recipient_name") or "",
+                        message_text=row["final_message"],
+                        card_url=row.get("generated_card_url"),
+                        quote_text=row.get("quote_text"),
+                        festival_name=row.get("festival_name"),
+                        wish_id=row["wish_id"]
+                    )
+                )
+                for row in channel_rows
+            ]
+
+            async for result in MessageChannelFactory.send_bulk(channel_type, deliveries):
+                outbox_id = outbox_ids[result.wish_id]
+                if result.success:
+                    sent_ids.append(outbox_id)
+                else:
+                    failures[outbox_id] = result.error or "Unknown error"
+
+        await self.store.complete(sent_ids, failures, permanent)
+
+        retried = len(failures) - len(permanent)
+        logger.info(
+            f"Worker {self.worker_id} delivered {len(sent_ids)}/{len(rows)} wishes"
+            + (f", {retried} will be retried" if retried else "")
+            + (f", {len(permanent)} failed permanently" if permanent else "")
+        )
+        return len(rows)
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """Deliver batches until stopped, sleeping when the outbox is empty"""
+        while not stop_event.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Delivery worker {self.worker_id} failed: {e}")
+                processed = 0
+
+            # A full batch suggests more work is waiting
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+
+class DeliveryWorkerPool:
+    """Delivery workers, plus the scheduled-delivery releaser, as background tasks"""
+
+    def __init__(self, size: Optional[int] = None, store: Optional[OutboxStore] = None):
+        self.size = settings.DELIVERY_WORKERS if size is None else size
+        self.store = store
+        self.scheduler = None
+        self._stop_event = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start the workers"""
+        if self.size <= 0:
+            return
+        store = self.store or OutboxStore()
+        for _ in range(self.size):
+            worker = DeliveryWorker(store=store)
+            self._tasks.append(asyncio.create_task(worker.run(self._stop_event)))
+        logger.info(f"Started {self.size} delivery workers")
+
+        if settings.DELIVERY_SCHEDULER_ENABLED:
+            from app.services.delivery_scheduler import DeliveryScheduler
+            self.scheduler = DeliveryScheduler(store=store)
+            self._tasks.append(asyncio.create_task(self.scheduler.run(self._stop_event)))
+
+    async def stop(self) -> None:
+        """Stop the workers after their current batch"""
+        self._stop_event.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -1,92 +1,177 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence
 from uuid import UUID
+from app.core.config import settings
 from app.core.database import get_supabase_admin
-from app.core.exceptions import NotFoundException
+from app.core.exceptions import NotFoundException, ValidationException
+from app.core.metrics import MetricFamily, registry
+from app.core.singleflight import SingleFlight
+from app.services.catalog_service import get_catalog
+from app.services.shuffle_bag import content_bags
+import asyncio
 import logging
+import random
 
 logger = logging.getLogger(__name__)
 
+# Festival columns a client may request with ?fields=
+FESTIVAL_COLUMNS = (
+    "id", "name", "slug", "religion_culture", "typical_month", "description",
+    "story_history", "cultural_significance", "traditions", "is_active",
+    "seo_title", "seo_description", "created_at"
+)
+REQUIRED_FIELDS = ("id", "slug", "name")
+
+# "image" is the festival's first image; "quotes" and "images" are embedded lists
+LIST_FIELD_CHOICES = FESTIVAL_COLUMNS + ("image",)
+DETAIL_FIELD_CHOICES = FESTIVAL_COLUMNS + ("quotes", "images")
+
+# What a festival card displays
+LIST_FIELDS = ("id", "name", "slug", "religion_culture", "typical_month", "description", "image")
+DETAIL_FIELDS = DETAIL_FIELD_CHOICES
+
+IMAGE_COLUMNS = "id, festival_id, image_url, alt_text, is_card_template"
+
+# Concurrent identical catalog reads share one query. Random picks are not
+# coalesced: concurrent callers should still get different content.
+reads = SingleFlight(timeout=settings.SINGLE_FLIGHT_TIMEOUT_SECONDS)
+
+
+def _collect_metrics():
+    # Joined calls are not cache hits: nothing outlives the call in flight
+    yield MetricFamily(
+        "festwish_singleflight_leaders_total", "counter", "Coalesced reads that went upstream"
+    ).add(reads.leaders, group="festival_reads")
+    yield MetricFamily(
+        "festwish_singleflight_followers_total", "counter", "Reads that joined a call already in flight"
+    ).add(reads.followers, group="festival_reads")
+
+
+registry.register_collector(_collect_metrics)
+
+
+def parse_fields(
+    fields: Optional[str],
+    choices: Sequence[str],
+    default: Sequence[str]
+) -> List[str]:
+    """Parse a comma-separated ?fields= value against a whitelist"""
+    if not fields:
+        return list(default)
+    
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(requested) - set(choices))
+    if unknown:
+        raise ValidationException(f"Unknown fields: {', '.join(unknown)}")
+    
+    return list(dict.fromkeys([*REQUIRED_FIELDS, *requested]))
+
+
+def select_columns(fields: Sequence[str]) -> str:
+    """PostgREST select list for the table columns among the requested fields"""
+    return ",".join(f for f in fields if f in FESTIVAL_COLUMNS)
+
 
 class FestivalService:
     def __init__(self):
         self.client = get_supabase_admin()
         self.table = "festivals"
     
-    async def get_all(self, active_only: bool = True) -> List[dict]:
-        """Get all festivals with their first image"""
-        query = self.client.table(self.table).select("*").order("name")
+    async def _attach_first_images(self, festivals: List[dict]) -> List[dict]:
+        """Set each festival's "image" to its first active image, in one query"""
+        if not festivals:
+            return festivals
+        
+        query = self.client.table("festival_images")\
+            .select(IMAGE_COLUMNS)\
+            .in_("festival_id", [f["id"] for f in festivals])\
+            .eq("is_active", True)\
+            .order("created_at,id")
+        result = await asyncio.to_thread(query.execute)
+        
+        first_images = {}
+        for image in result.data:
+            first_images.setdefault(image.pop("festival_id"), image)
+        
+        for festival in festivals:
+            festival["image"] = first_images.get(festival["id"])
+        
+        return festivals
+    
+    @reads.coalesce
+    async def get_all(
+        self, active_only: bool = True, fields: Sequence[str] = LIST_FIELDS
+    ) -> List[dict]:
+        """Get all festivals, projected to the requested fields"""
+        query = self.client.table(self.table).select(select_columns(fields)).order("name")
         
         if active_only:
             query = query.eq("is_active", True)
         
-        result = query.execute()
+        result = await asyncio.to_thread(query.execute)
         festivals = result.data
         
-        # Fetch first image for each festival
-        for festival in festivals:
-            image_result = self.client.table("festival_images")\
-                .select("*")\
-                .eq("festival_id", festival["id"])\
-                .eq("is_active", True)\
-                .limit(1)\
-                .execute()
-            
-            festival["image"] = image_result.data[0] if image_result.data else None
+        if "image" in fields:
+            await self._attach_first_images(festivals)
         
         return festivals
     
-    async def get_by_id(self, festival_id: UUID) -> dict:
+    @reads.coalesce
+    async def get_by_id(self, festival_id: UUID, fields: Sequence[str] = FESTIVAL_COLUMNS) -> dict:
         """Get festival by ID with full details"""
-        result = self.client.table(self.table)\
-            .select("*")\
+        query = self.client.table(self.table)\
+            .select(select_columns(fields))\
             .eq("id", str(festival_id))\
-            .single()\
-            .execute()
+            .single()
+        result = await asyncio.to_thread(query.execute)
         
         if not result.data:
             raise NotFoundException("Festival", str(festival_id))
         
         return result.data
     
-    async def get_by_slug(self, slug: str) -> dict:
+    @reads.coalesce
+    async def get_by_slug(self, slug: str, fields: Sequence[str] = FESTIVAL_COLUMNS) -> dict:
         """Get festival by URL slug"""
-        result = self.client.table(self.table)\
-            .select("*")\
+        query = self.client.table(self.table)\
+            .select(select_columns(fields))\
             .eq("slug", slug)\
-            .single()\
-            .execute()
+            .single()
+        result = await asyncio.to_thread(query.execute)
         
         if not result.data:
             raise NotFoundException("Festival", slug)
         
         return result.data
     
+    @reads.coalesce
     async def get_quotes(self, festival_id: UUID) -> List[dict]:
         """Get all quotes for a festival"""
-        result = self.client.table("festival_quotes")\
+        query = self.client.table("festival_quotes")\
             .select("*")\
             .eq("festival_id", str(festival_id))\
-            .eq("is_active", True)\
-            .execute()
+            .eq("is_active", True)
+        result = await asyncio.to_thread(query.execute)
         
         return result.data
     
+    @reads.coalesce
     async def get_images(self, festival_id: UUID) -> List[dict]:
         """Get all images for a festival"""
-        result = self.client.table("festival_images")\
+        query = self.client.table("festival_images")\
             .select("*")\
             .eq("festival_id", str(festival_id))\
-            .eq("is_active", True)\
-            .execute()
+            .eq("is_active", True)
+        result = await asyncio.to_thread(query.execute)
         
         return result.data
     
     async def get_random_quote(self, festival_id: UUID) -> Optional[dict]:
         """Get a random quote for a festival"""
-        result = self.client.rpc(
+        query = self.client.rpc(
             "get_random_quote",
             {"p_festival_id": str(festival_id)}
-        ).execute()
+        )
+        result = await asyncio.to_thread(query.execute)
         
         if result.data and len(result.data) > 0:
             return result.data[0]
@@ -94,60 +179,121 @@ class FestivalService:
     
     async def get_random_image(self, festival_id: UUID) -> Optional[dict]:
         """Get a random image for a festival"""
-        result = self.client.rpc(
+        query = self.client.rpc(
             "get_random_festival_image",
             {"p_festival_id": str(festival_id)}
-        ).execute()
+        )
+        result = await asyncio.to_thread(query.execute)
         
         if result.data and len(result.data) > 0:
             return result.data[0]
         return None
     
+    async def pick_random_image(self, festival_id: UUID) -> Optional[dict]:
+        """Random image for a festival, picked from the catalog when the festival is in it"""
+        catalog = await get_catalog()
+        if str(festival_id) in catalog.festivals_by_id:
+            images = catalog.images_by_festival.get(str(festival_id))
+            return random.choice(images) if images else None
+        return await self.get_random_image(festival_id)
+    
     async def get_random_message(
         self, festival_id: UUID, relationship_id: UUID
     ) -> Optional[dict]:
         """Get a random wish message for festival-relationship combo"""
-        result = self.client.rpc(
+        query = self.client.rpc(
             "get_random_message",
             {
                 "p_festival_id": str(festival_id),
                 "p_relationship_id": str(relationship_id)
             }
-        ).execute()
+        )
+        result = await asyncio.to_thread(query.execute)
         
         if result.data and len(result.data) > 0:
             return result.data[0]
         return None
     
-    async def get_festival_detail(self, festival_id: UUID) -> dict:
-        """Get complete festival details with quotes and images"""
-        festival = await self.get_by_id(festival_id)
-        quotes = await self.get_quotes(festival_id)
-        images = await self.get_images(festival_id)
+    @reads.coalesce
+    async def get_messages(self, festival_id: UUID, relationship_id: UUID) -> List[dict]:
+        """Get all active wish messages for a festival-relationship combo"""
+        query = self.client.table("wish_messages")\
+            .select("id, message_text, tone, language")\
+            .eq("festival_id", str(festival_id))\
+            .eq("relationship_id", str(relationship_id))\
+            .eq("is_active", True)\
+            .order("created_at,id")
+        result = await asyncio.to_thread(query.execute)
+        return result.data
+    
+    async def get_rotated_content(
+        self, owner: str, festival_id: UUID, relationship_id: Optional[UUID] = None
+    ) -> Optional[dict]:
+        """
+        Next quote, image and message from the owner's shuffle bags: no item
+        repeats until its pool is used up. None if the festival is not in the catalog.
+        """
+        catalog = await get_catalog()
+        key = str(festival_id)
+        if key not in catalog.festivals_by_id:
+            return None
+        
+        result = {
+            "quote": content_bags.pick((owner, key, "quote"), catalog.quotes_by_festival.get(key, [])),
+            "image": content_bags.pick((owner, key, "image"), catalog.images_by_festival.get(key, [])),
+            "message": None
+        }
+        if relationship_id:
+            messages = await self.get_messages(festival_id, relationship_id)
+            result["message"] = content_bags.pick((owner, key, str(relationship_id)), messages)
+        
+        return result
+    
+    @reads.coalesce
+    async def get_festival_detail(
+        self, festival_id: UUID, fields: Sequence[str] = DETAIL_FIELDS
+    ) -> dict:
+        """Get festival details with the requested fields, quotes and images"""
+        # Coalesced results are shared: build a new dict instead of mutating
+        festival = dict(await self.get_by_id(festival_id, fields))
         
-        festival["quotes"] = quotes
-        festival["images"] = images
+        if "quotes" in fields:
+            festival["quotes"] = await self.get_quotes(festival_id)
+        if "images" in fields:
+            festival["images"] = await self.get_images(festival_id)
         
         return festival
     
-    async def get_by_culture(self, culture: str) -> List[dict]:
+    @reads.coalesce
+    async def get_by_culture(
+        self, culture: str, fields: Sequence[str] = LIST_FIELDS
+    ) -> List[dict]:
         """Get festivals by religion/culture"""
-        result = self.client.table(self.table)\
-            .select("*")\
+        query = self.client.table(self.table)\
+            .select(select_columns(fields))\
             .eq("religion_culture", culture)\
             .eq("is_active", True)\
-            .order("name")\
-            .execute()
+            .order("name")
+        result = await asyncio.to_thread(query.execute)
+        
+        if "image" in fields:
+            await self._attach_first_images(result.data)
         
         return result.data
     
-    async def get_by_month(self, month: str) -> List[dict]:
+    @reads.coalesce
+    async def get_by_month(
+        self, month: str, fields: Sequence[str] = LIST_FIELDS
+    ) -> List[dict]:
         """Get festivals by typical month"""
-        result = self.client.table(self.table)\
-            .select("*")\
+        query = self.client.table(self.table)\
+            .select(select_columns(fields))\
             .eq("typical_month", month)\
             .eq("is_active", True)\
-            .order("name")\
-            .execute()
+            .order("name")
+        result = await asyncio.to_thread(query.execute)
+        
+        if "image" in fields:
+            await self._attach_first_images(result.data)
         
         return result.data
@@ -1,17 +1,56 @@
-from typing import Optional, BinaryIO
+from typing import List, Optional, BinaryIO, Tuple
 from uuid import UUID, uuid4
+from io import BytesIO
+import hashlib
+from PIL import Image
 from app.core.database import get_supabase_admin
-from app.core.config import settings
+from app.core.storage import get_storage
+from app.core.pagination import DEFAULT_PAGE_SIZE, apply_keyset, paginate
 from app.core.exceptions import StorageException, NotFoundException
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Difference hash grid: 9x8 pixels yields 8x8 = 64 comparison bits
+DHASH_SIZE = 8
+# A perceptual match must have the same dimensions and differ in at most this many bits
+DHASH_MAX_DISTANCE = 4
+# Flat or low-detail images (solid colours, smooth gradients) hash to nearly
+# all zeros or all ones and collide with each other: never match on those
+DHASH_MIN_DETAIL_BITS = 8
+# Multi-index hashing: split the hash into DHASH_MAX_DISTANCE + 1 bands. Two
+# hashes within the distance differ in at most that many bands, so they
+# share at least one band exactly and an indexed band lookup finds every match
+DHASH_BANDS = DHASH_MAX_DISTANCE + 1
+
+
+def _hamming_distance(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def _hash_bands(perceptual_hash: str) -> List[str]:
+    """The hash cut into DHASH_BANDS bit ranges, each tagged with its position"""
+    bits = DHASH_SIZE * DHASH_SIZE
+    value = int(perceptual_hash, 16)
+    bands = []
+    start = 0
+    for band in range(DHASH_BANDS):
+        width = (bits - start) // (DHASH_BANDS - band)
+        bands.append(f"{band}:{(value >> start) & ((1 << width) - 1):x}")
+        start += width
+    return bands
+
+
+def _is_distinctive(perceptual_hash: str) -> bool:
+    """Whether a dHash carries enough detail to be compared at all"""
+    set_bits = bin(int(perceptual_hash, 16)).count("1")
+    return DHASH_MIN_DETAIL_BITS <= set_bits <= DHASH_SIZE * DHASH_SIZE - DHASH_MIN_DETAIL_BITS
+
 
 class ImageService:
     def __init__(self):
         self.client = get_supabase_admin()
-        self.bucket = settings.STORAGE_BUCKET
+        self.storage = get_storage()
         self.table = "user_uploaded_images"
     
     async def upload_user_image(
@@ -21,21 +60,26 @@ class ImageService:
         filename: str,
         mime_type: str
     ) -> dict:
-        """Upload a user image to storage"""
+        """Upload a user image to storage, reusing an existing copy if present"""
         try:
+            content_hash = hashlib.sha256(file_content).hexdigest()
+            perceptual_hash, size = self._perceptual_hash(file_content)
+            
+            # Return the existing record if the user already uploaded this image
+            existing = await self.find_duplicate(user_id, content_hash, perceptual_hash, size)
+            if existing:
+                logger.info(f"Duplicate upload for user {user_id}, reusing image {existing['id']}")
+                return existing
+            
             # Generate unique storage path
             file_ext = filename.split(".")[-1] if "." in filename else "jpg"
             storage_path = f"user_uploads/{user_id}/{uuid4()}.{file_ext}"
             
-            # Upload to Supabase storage
-            self.client.storage.from_(self.bucket).upload(
-                storage_path,
-                file_content,
-                {"content-type": mime_type}
-            )
+            # Upload to storage
+            self.storage.upload(storage_path, file_content, mime_type)
             
             # Get public URL
-            image_url = self.client.storage.from_(self.bucket).get_public_url(storage_path)
+            image_url = self.storage.get_public_url(storage_path)
             
             # Save record to database
             image_data = {
@@ -44,29 +88,114 @@ class ImageService:
                 "storage_path": storage_path,
                 "original_filename": filename,
                 "file_size": len(file_content),
-                "mime_type": mime_type
+                "mime_type": mime_type,
+                "content_hash": content_hash,
+                "perceptual_hash": perceptual_hash,
+                "perceptual_bands": _hash_bands(perceptual_hash) if perceptual_hash else None,
+                "width": size[0] if size else None,
+                "height": size[1] if size else None
             }
             
-            result = self.client.table(self.table).insert(image_data).execute()
+            try:
+                result = self.client.table(self.table).insert(image_data).execute()
+            except Exception:
+                # A concurrent upload of the same bytes won the unique index
+                existing = await self.find_duplicate(user_id, content_hash)
+                if not existing:
+                    raise
+                self.storage.remove([storage_path])
+                return existing
             
             if not result.data:
                 raise StorageException("Failed to save image record")
             
             return result.data[0]
             
+        except StorageException:
+            raise
         except Exception as e:
             logger.error(f"Failed to upload image: {e}")
             raise StorageException(f"Failed to upload image: {str(e)}")
     
-    async def get_user_images(self, user_id: UUID) -> list:
-        """Get all images uploaded by a user"""
+    async def find_duplicate(
+        self,
+        user_id: UUID,
+        content_hash: str,
+        perceptual_hash: Optional[str] = None,
+        size: Optional[Tuple[int, int]] = None
+    ) -> Optional[dict]:
+        """
+        Find an existing upload by the same user: the same bytes, or a
+        same-sized image whose perceptual hash is within DHASH_MAX_DISTANCE
+        """
         result = self.client.table(self.table)\
             .select("*")\
             .eq("user_id", str(user_id))\
-            .order("created_at", desc=True)\
+            .eq("content_hash", content_hash)\
+            .limit(1)\
             .execute()
+        if result.data:
+            return result.data[0]
         
-        return result.data
+        if not perceptual_hash or not size or not _is_distinctive(perceptual_hash):
+            return None
+        
+        # Every image within DHASH_MAX_DISTANCE shares a band with this one;
+        # confirm each candidate on the full distance
+        candidates = self.client.table(self.table)\
+            .select("*")\
+            .eq("user_id", str(user_id))\
+            .eq("width", size[0])\
+            .eq("height", size[1])\
+            .ov("perceptual_bands", _hash_bands(perceptual_hash))\
+            .execute()
+        
+        matches = [
+            (_hamming_distance(row["perceptual_hash"], perceptual_hash), row.get("created_at") or "", row)
+            for row in candidates.data
+            if _is_distinctive(row["perceptual_hash"])
+        ]
+        matches = [match for match in matches if match[0] <= DHASH_MAX_DISTANCE]
+        if not matches:
+            return None
+        # Closest first, then the oldest upload, so repeated calls agree
+        return min(matches, key=lambda match: match[:2])[2]
+    
+    def _perceptual_hash(self, file_content: bytes) -> Tuple[Optional[str], Optional[Tuple[int, int]]]:
+        """64-bit difference hash (dHash) as a hex string, and the image's (width, height)"""
+        try:
+            with Image.open(BytesIO(file_content)) as img:
+                size = img.size
+                grayscale = img.convert("L").resize(
+                    (DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.LANCZOS
+                )
+                pixels = list(grayscale.getdata())
+        except Exception as e:
+            logger.warning(f"Could not compute perceptual hash: {e}")
+            return None, None
+        
+        bits = 0
+        for row in range(DHASH_SIZE):
+            offset = row * (DHASH_SIZE + 1)
+            for col in range(DHASH_SIZE):
+                bits = (bits << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+        
+        return f"{bits:016x}", size
+    
+    async def get_user_images(
+        self,
+        user_id: UUID,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Tuple[list, Optional[str]]:
+        """Get a page of images uploaded by a user, newest first"""
+        query = self.client.table(self.table)\
+            .select("*")\
+            .eq("user_id", str(user_id))
+        
+        result = apply_keyset(query, limit, cursor).execute()
+        
+        return paginate(result.data, limit)
     
     async def get_image(self, image_id: UUID) -> dict:
         """Get a specific image by ID"""
@@ -90,15 +219,16 @@ class ImageService:
             if image["user_id"] != str(user_id):
                 raise StorageException("Not authorized to delete this image")
             
-            # Delete from storage
-            self.client.storage.from_(self.bucket).remove([image["storage_path"]])
-            
-            # Delete from database
+            # Delete the record first: if the storage delete then fails, the
+            # orphaned object is reclaimed by the storage GC job
             self.client.table(self.table)\
                 .delete()\
                 .eq("id", str(image_id))\
                 .execute()
             
+            # Delete from storage
+            self.storage.remove([image["storage_path"]])
+            
             return True
             
         except Exception as e:
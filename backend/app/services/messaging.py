@@ -2,14 +2,29 @@
 Messaging Abstraction Layer
 ---------------------------
 This module provides a channel-agnostic interface for sending wishes.
-Actual integrations (WhatsApp, SMS, Email) are stubbed for future implementation.
+Email is sent over pooled SMTP; WhatsApp and SMS are stubbed for future
+implementation.
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
 from uuid import UUID
+from collections import OrderedDict
+from email.message import EmailMessage
+from email.utils import make_msgid
+from io import BytesIO
+import asyncio
+import hashlib
+import html
 import logging
+import smtplib
+import time
+import httpx
+from PIL import Image
+from app.core.config import settings
+from app.core.metrics import MetricFamily, registry
+from app.services.smtp_pool import SMTPConnectionPool
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +37,7 @@ class WishContent:
     card_url: Optional[str] = None
     quote_text: Optional[str] = None
     festival_name: Optional[str] = None
+    wish_id: Optional[str] = None
 
 
 @dataclass
@@ -30,11 +46,261 @@ class SendResult:
     success: bool
     message_id: Optional[str] = None
     error: Optional[str] = None
+    recipient: Optional[str] = None
+    wish_id: Optional[str] = None
+
+
+# =====================================================
+# PAYLOAD PREPARATION
+# =====================================================
+# Each channel needs its own rendering of a wish. In a bulk send the same
+# content goes to many recipients, so the recipient-independent parts (the
+# card, its WhatsApp JPEG and the message bodies) are computed once and
+# shared; only the greeting is added per recipient.
+
+# GSM 03.38 basic character set (1 septet each) and extension table (2 septets)
+GSM7_BASIC = set(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM7_EXTENDED = set("^{}\\[~]|€\f")
+
+SMS_SINGLE_LIMITS = {"GSM-7": 160, "UCS-2": 70}
+SMS_SEGMENT_LIMITS = {"GSM-7": 153, "UCS-2": 67}
+
+WHATSAPP_MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+
+@dataclass
+class SMSPayload:
+    """SMS text split into concatenated-SMS segments"""
+    encoding: str
+    segments: List[str]
+
+
+@dataclass
+class WhatsAppPayload:
+    """WhatsApp caption and a card JPEG within the media size limit"""
+    caption: str
+    image: Optional[bytes] = None
+
+
+@dataclass
+class EmailPayload:
+    """Email subject, text and HTML bodies, and inline card bytes"""
+    subject: str
+    text: str
+    html: str
+    card_bytes: Optional[bytes] = None
+
+
+def _greeting(content: WishContent) -> str:
+    return f"Dear {content.recipient_name}," if content.recipient_name else ""
+
+
+def _sms_units(char: str, encoding: str) -> int:
+    if encoding == "GSM-7":
+        return 2 if char in GSM7_EXTENDED else 1
+    # UTF-16 code units: characters outside the BMP take a surrogate pair
+    return 2 if ord(char) > 0xFFFF else 1
+
+
+def is_gsm7(text: str) -> bool:
+    """Whether text fits the GSM-7 alphabet"""
+    return all(c in GSM7_BASIC or c in GSM7_EXTENDED for c in text)
+
+
+def segment_sms(text: str, encoding: Optional[str] = None) -> SMSPayload:
+    """Split text into SMS segments using GSM-7 when possible, else UCS-2"""
+    encoding = encoding or ("GSM-7" if is_gsm7(text) else "UCS-2")
+    units = [_sms_units(c, encoding) for c in text]
+    
+    if sum(units) <= SMS_SINGLE_LIMITS[encoding]:
+        return SMSPayload(encoding=encoding, segments=[text] if text else [])
+    
+    # Segments never split an escape sequence or surrogate pair
+    limit = SMS_SEGMENT_LIMITS[encoding]
+    segments, current, used = [], [], 0
+    for char, size in zip(text, units):
+        if used + size > limit:
+            segments.append("".join(current))
+            current, used = [], 0
+        current.append(char)
+        used += size
+    if current:
+        segments.append("".join(current))
+    
+    return SMSPayload(encoding=encoding, segments=segments)
+
+
+def compress_jpeg(image_bytes: bytes, max_bytes: int) -> bytes:
+    """Re-encode (and if needed downscale) a JPEG until it fits max_bytes"""
+    if len(image_bytes) <= max_bytes:
+        return image_bytes
+    
+    image = Image.open(BytesIO(image_bytes)).convert("RGB")
+    while True:
+        for quality in (85, 75, 65, 55, 45):
+            output = BytesIO()
+            image.save(output, format="JPEG", quality=quality, optimize=True)
+            if output.tell() <= max_bytes:
+                return output.getvalue()
+        if min(image.size) < 64:
+            return output.getvalue()
+        image = image.resize(
+            (int(image.width * 0.75), int(image.height * 0.75)), Image.Resampling.LANCZOS
+        )
+
+
+@dataclass
+class _WishBody:
+    """The recipient-independent text of a wish, shared by every channel"""
+    subject: str
+    text: str
+    html: str
+    gsm7: bool
+
+
+class PayloadCache:
+    """
+    Recipient-independent payload parts: card bytes and the WhatsApp JPEG
+    keyed by card URL, message bodies keyed by message, quote and festival.
+    Concurrent requests for the same key share one computation.
+    """
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, asyncio.Future]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def body_hash(content: WishContent) -> str:
+        """Hash of everything that affects the body (not the recipient or wish id)"""
+        parts = (content.message_text, content.quote_text, content.festival_name)
+        return hashlib.sha256("\x1f".join(p or "" for p in parts).encode()).hexdigest()
+    
+    async def _get(self, key: tuple, compute) -> object:
+        future = self._entries.get(key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(compute())
+            self._entries[key] = future
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # Don't cache failures
+            if self._entries.get(key) is future:
+                del self._entries[key]
+            raise
+    
+    async def _fetch_card(self, card_url: str) -> bytes:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(card_url)
+            response.raise_for_status()
+            return response.content
+    
+    async def get_card_bytes(self, card_url: str) -> bytes:
+        """Card image bytes, downloaded once per URL"""
+        return await self._get(("card", card_url), lambda: self._fetch_card(card_url))
+    
+    async def _card_or_none(self, content: WishContent) -> Optional[bytes]:
+        if not content.card_url:
+            return None
+        try:
+            return await self.get_card_bytes(content.card_url)
+        except Exception as e:
+            logger.warning(f"Preparing payload without card, download failed: {e}")
+            return None
+    
+    async def _whatsapp_image(self, content: WishContent) -> Optional[bytes]:
+        """Card compressed to the WhatsApp media limit, once per URL"""
+        if not content.card_url:
+            return None
+        
+        async def compress() -> bytes:
+            card_bytes = await self.get_card_bytes(content.card_url)
+            return await asyncio.to_thread(compress_jpeg, card_bytes, WHATSAPP_MAX_IMAGE_BYTES)
+        
+        try:
+            return await self._get(("whatsapp_image", content.card_url), compress)
+        except Exception as e:
+            logger.warning(f"Preparing payload without card, download failed: {e}")
+            return None
+    
+    async def _build_body(self, content: WishContent) -> _WishBody:
+        quote = f'"{content.quote_text}"' if content.quote_text else ""
+        html_parts = [f"<p>{html.escape(content.message_text)}</p>"]
+        if quote:
+            html_parts.append(f"<p><em>{html.escape(quote)}</em></p>")
+        return _WishBody(
+            subject=f"Happy {content.festival_name}!" if content.festival_name else "A wish for you",
+            text="\n\n".join(part for part in (content.message_text, quote) if part),
+            html="".join(html_parts),
+            gsm7=is_gsm7(content.message_text)
+        )
+    
+    async def _body(self, content: WishContent) -> _WishBody:
+        return await self._get(("body", self.body_hash(content)), lambda: self._build_body(content))
+    
+    async def _prepare_sms(self, content: WishContent) -> SMSPayload:
+        body = await self._body(content)
+        greeting = _greeting(content)
+        text = " ".join(part for part in (greeting, content.message_text) if part)
+        encoding = "GSM-7" if body.gsm7 and is_gsm7(greeting) else "UCS-2"
+        return segment_sms(text, encoding)
+    
+    async def _prepare_whatsapp(self, content: WishContent) -> WhatsAppPayload:
+        caption = "\n\n".join(part for part in (_greeting(content), content.message_text) if part)
+        return WhatsAppPayload(caption=caption, image=await self._whatsapp_image(content))
+    
+    async def _prepare_email(self, content: WishContent) -> EmailPayload:
+        body = await self._body(content)
+        greeting = _greeting(content)
+        card_bytes = await self._card_or_none(content)
+        
+        html_parts = []
+        if card_bytes:
+            html_parts.append(f'<img src="cid:{EmailChannel.CARD_CID}" alt="Greeting card" style="max-width:100%">')
+        if greeting:
+            html_parts.append(f"<p>{html.escape(greeting)}</p>")
+        html_parts.append(body.html)
+        
+        return EmailPayload(
+            subject=body.subject,
+            text="\n\n".join(part for part in (greeting, body.text) if part),
+            html=f"<html><body>{''.join(html_parts)}</body></html>",
+            card_bytes=card_bytes
+        )
+    
+    async def prepare(self, channel_type: str, content: WishContent):
+        """Get the channel-specific payload for a wish, adding the greeting to shared parts"""
+        preparers = {
+            "sms": self._prepare_sms,
+            "whatsapp": self._prepare_whatsapp,
+            "email": self._prepare_email,
+        }
+        preparer = preparers.get(channel_type)
+        if preparer is None:
+            raise ValueError(f"No payload variant for channel: {channel_type}")
+        return await preparer(content)
+
+
+payload_cache = PayloadCache()
 
 
 class MessageChannel(ABC):
     """Abstract base class for message channels"""
     
+    # Stub channels are listed but have no provider integration yet
+    is_stub: bool = False
+    
     @property
     @abstractmethod
     def channel_type(self) -> str:
@@ -67,6 +333,8 @@ class WhatsAppChannel(MessageChannel):
     - Support for media messages
     """
     
+    is_stub = True
+    
     @property
     def channel_type(self) -> str:
         return "whatsapp"
@@ -83,11 +351,14 @@ class WhatsAppChannel(MessageChannel):
             recipient: Phone number in international format
             content: WishContent object
         """
-        logger.info(f"[STUB] Would send WhatsApp to {recipient}")
+        payload = await payload_cache.prepare(self.channel_type, content)
+        logger.info(
+            f"[STUB] Would send WhatsApp to {recipient} "
+            f"({len(payload.image or b'')} byte card)"
+        )
         # TODO: Implement WhatsApp Business API integration
         # - Initialize WhatsApp client
         # - Format message according to template
-        # - Attach card image if available
         # - Send and capture message ID
         return SendResult(
             success=False,
@@ -111,6 +382,8 @@ class SMSChannel(MessageChannel):
     - International number support
     """
     
+    is_stub = True
+    
     @property
     def channel_type(self) -> str:
         return "sms"
@@ -127,10 +400,13 @@ class SMSChannel(MessageChannel):
             recipient: Phone number
             content: WishContent object
         """
-        logger.info(f"[STUB] Would send SMS to {recipient}")
+        payload = await payload_cache.prepare(self.channel_type, content)
+        logger.info(
+            f"[STUB] Would send SMS to {recipient} "
+            f"({len(payload.segments)} {payload.encoding} segments)"
+        )
         # TODO: Implement Twilio SMS integration
         # - Initialize Twilio client
-        # - Format message for SMS (character limits)
         # - Use MMS if card image available
         # - Send and capture SID
         return SendResult(
@@ -146,46 +422,79 @@ class SMSChannel(MessageChannel):
 
 class EmailChannel(MessageChannel):
     """
-    Email integration via SendGrid (STUB)
+    Email integration over SMTP
     
-    Future implementation notes:
-    - Use SendGrid API
-    - HTML email templates
-    - Inline card image
-    - Tracking and analytics
+    Sends go through a pool of persistent SMTP sessions (SMTP_POOL_SIZE).
+    The card is embedded inline as a CID attachment; the card bytes and
+    message body are shared by every recipient of the same wish.
     """
     
+    CARD_CID = "festwish-card"
+    
+    def __init__(self):
+        self._pool: Optional[SMTPConnectionPool] = None
+    
     @property
     def channel_type(self) -> str:
         return "email"
     
+    @property
+    def pool(self) -> SMTPConnectionPool:
+        if self._pool is None:
+            self._pool = SMTPConnectionPool(
+                host=settings.SMTP_HOST,
+                port=settings.SMTP_PORT,
+                username=settings.SMTP_USERNAME or None,
+                password=settings.SMTP_PASSWORD or None,
+                use_tls=settings.SMTP_USE_TLS,
+                size=settings.SMTP_POOL_SIZE,
+                timeout=settings.SMTP_TIMEOUT_SECONDS
+            )
+        return self._pool
+    
+    def build_message(self, recipient: str, payload: EmailPayload) -> EmailMessage:
+        """Build a text + HTML email with the card as an inline attachment"""
+        message = EmailMessage()
+        message["From"] = settings.SMTP_FROM
+        message["To"] = recipient
+        message["Subject"] = payload.subject
+        message["Message-ID"] = make_msgid(domain=settings.SMTP_FROM.rsplit("@", 1)[-1].strip(">"))
+        message.set_content(payload.text)
+        message.add_alternative(payload.html, subtype="html")
+        
+        if payload.card_bytes:
+            message.get_payload()[1].add_related(
+                payload.card_bytes, maintype="image", subtype="jpeg", cid=f"<{self.CARD_CID}>"
+            )
+        
+        return message
+    
     async def send(
         self,
         recipient: str,
         content: WishContent
     ) -> SendResult:
         """
-        Send wish via Email (STUB)
+        Send wish via Email
         
         Args:
             recipient: Email address
             content: WishContent object
         """
-        logger.info(f"[STUB] Would send Email to {recipient}")
-        # TODO: Implement SendGrid email integration
-        # - Initialize SendGrid client
-        # - Build HTML email from template
-        # - Embed card image
-        # - Send and capture message ID
-        return SendResult(
-            success=False,
-            error="Email integration not yet implemented"
-        )
+        payload = await payload_cache.prepare(self.channel_type, content)
+        message = self.build_message(recipient, payload)
+        
+        try:
+            await self.pool.send(message)
+        except smtplib.SMTPRecipientsRefused as e:
+            # The address is bad, not the provider: don't trip the breaker
+            return SendResult(success=False, error=f"Recipient refused: {e.recipients}")
+        
+        return SendResult(success=True, message_id=message["Message-ID"])
     
     async def is_available(self) -> bool:
-        """Check if Email is configured"""
-        # TODO: Check for SendGrid API key
-        return False
+        """Check if an SMTP server is configured"""
+        return bool(settings.SMTP_HOST)
 
 
 class DownloadChannel(MessageChannel):
@@ -227,25 +536,132 @@ class MessageChannelFactory:
         "download": DownloadChannel
     }
     
+    # Maximum concurrent sends per channel, shared across all bulk sends
+    _concurrency_limits = {
+        "whatsapp": 20,
+        "sms": 20,
+        "email": 10,
+        "download": 100
+    }
+    
+    _instances: Dict[str, MessageChannel] = {}
+    _semaphores: Dict[str, asyncio.Semaphore] = {}
+    
+    # Configuration cache, see _get_configured(); breaker state is read live
+    _configured: Dict[str, bool] = {}
+    _configured_checked_at: float = 0.0
+    _refresh_task: Optional[asyncio.Task] = None
+    
     @classmethod
     def get_channel(cls, channel_type: str) -> MessageChannel:
-        """Get a channel instance by type"""
-        channel_class = cls._channels.get(channel_type.lower())
-        if not channel_class:
-            raise ValueError(f"Unknown channel type: {channel_type}")
-        return channel_class()
+        """Get the shared, rate-limited channel instance by type"""
+        from app.services.channel_guard import GuardedChannel, TokenBucket, CircuitBreaker
+        
+        channel_type = channel_type.lower()
+        channel = cls._instances.get(channel_type)
+        if channel is None:
+            channel_class = cls._channels.get(channel_type)
+            if not channel_class:
+                raise ValueError(f"Unknown channel type: {channel_type}")
+            channel = cls._instances[channel_type] = GuardedChannel(
+                channel_class(),
+                TokenBucket(
+                    rate=settings.channel_rate_limits.get(channel_type, 0),
+                    max_waiters=settings.CHANNEL_MAX_QUEUE
+                ),
+                CircuitBreaker(
+                    failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                    reset_timeout=settings.CIRCUIT_RESET_SECONDS
+                )
+            )
+        return channel
+    
+    @classmethod
+    def get_channel_metrics(cls) -> Dict[str, dict]:
+        """Queue depth, in-flight sends and breaker state per channel"""
+        return {
+            channel_type: channel.metrics()
+            for channel_type, channel in cls._instances.items()
+        }
+    
+    @classmethod
+    def _get_semaphore(cls, channel_type: str) -> asyncio.Semaphore:
+        """Get the concurrency limiter shared by all sends on a channel"""
+        semaphore = cls._semaphores.get(channel_type)
+        if semaphore is None:
+            semaphore = cls._semaphores[channel_type] = asyncio.Semaphore(
+                cls._concurrency_limits.get(channel_type, 10)
+            )
+        return semaphore
     
     @classmethod
-    def get_available_channels(cls) -> list:
-        """Get list of available channel types"""
+    async def _check_configured(cls, channel_type: str) -> bool:
+        """Run one channel's configuration check, treating errors and timeouts as unconfigured"""
+        try:
+            return await asyncio.wait_for(
+                cls.get_channel(channel_type).channel.is_available(),
+                timeout=settings.CHANNEL_AVAILABILITY_TIMEOUT_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"Availability check for {channel_type} failed: {e!r}")
+            return False
+    
+    @classmethod
+    async def refresh_availability(cls) -> Dict[str, bool]:
+        """Check every channel's configuration concurrently and cache the results"""
+        channel_types = list(cls._channels)
+        results = await asyncio.gather(
+            *(cls._check_configured(channel_type) for channel_type in channel_types)
+        )
+        cls._configured = dict(zip(channel_types, results))
+        cls._configured_checked_at = time.monotonic()
+        return cls._configured
+    
+    @classmethod
+    async def _get_configured(cls) -> Dict[str, bool]:
+        """Cached configuration checks; refreshed in the background once stale"""
+        if not cls._configured:
+            return await cls.refresh_availability()
+        
+        age = time.monotonic() - cls._configured_checked_at
+        if age > settings.CHANNEL_AVAILABILITY_TTL_SECONDS and (
+            cls._refresh_task is None or cls._refresh_task.done()
+        ):
+            cls._refresh_task = asyncio.create_task(cls.refresh_availability())
+        
+        return cls._configured
+    
+    @classmethod
+    async def is_channel_configured(cls, channel_type: str) -> bool:
+        """Whether a channel has a provider configured (cached)"""
+        return (await cls._get_configured()).get(channel_type.lower(), False)
+    
+    @classmethod
+    async def is_channel_available(cls, channel_type: str) -> bool:
+        """Whether a channel is configured and its provider is not tripped"""
+        if not await cls.is_channel_configured(channel_type):
+            return False
+        # Breaker state is always read live so a recovered provider gets probed
+        return not cls.get_channel(channel_type).tripped
+    
+    @classmethod
+    async def _unavailable_error(cls, channel_type: str) -> str:
+        """Why a channel refuses sends: missing configuration or a tripped provider"""
+        if not await cls.is_channel_configured(channel_type):
+            return f"{channel_type} channel is not configured"
+        return f"{channel_type} provider is unavailable (circuit open)"
+    
+    @classmethod
+    async def get_available_channels(cls) -> list:
+        """Get list of channel types with their cached availability"""
+        await cls._get_configured()
         available = []
         for channel_type, channel_class in cls._channels.items():
-            channel = channel_class()
-            # Note: This is sync check, for async use await in actual usage
             available.append({
                 "type": channel_type,
                 "name": channel_type.title(),
-                "stub": channel_type != "download"
+                "stub": channel_class.is_stub,
+                "available": await cls.is_channel_available(channel_type)
             })
         return available
     
@@ -259,10 +675,102 @@ class MessageChannelFactory:
         """Send a wish through the specified channel"""
         channel = cls.get_channel(channel_type)
         
-        if not await channel.is_available():
+        if not await cls.is_channel_available(channel_type):
             return SendResult(
                 success=False,
-                error=f"{channel_type} channel is not configured"
+                error=await cls._unavailable_error(channel_type),
+                recipient=recipient
             )
         
         return await channel.send(recipient, content)
+    
+    @classmethod
+    async def send_bulk(
+        cls,
+        channel_type: str,
+        deliveries: Iterable[Tuple[str, WishContent]],
+        concurrency: Optional[int] = None
+    ) -> AsyncIterator[SendResult]:
+        """
+        Send many wishes through one channel, yielding results as they complete
+        
+        Sends fan out up to the channel's concurrency limit, which is shared
+        with every other bulk send on the same channel. Results arrive in
+        completion order; use SendResult.recipient to correlate them.
+        
+        Args:
+            channel_type: Channel to send through
+            deliveries: (recipient, WishContent) pairs
+            concurrency: Optional lower in-flight cap for this call
+        """
+        channel = cls.get_channel(channel_type)
+        
+        if not await cls.is_channel_available(channel_type):
+            error = await cls._unavailable_error(channel_type)
+            for recipient, content in deliveries:
+                yield SendResult(
+                    success=False,
+                    error=error,
+                    recipient=recipient,
+                    wish_id=content.wish_id
+                )
+            return
+        
+        semaphore = cls._get_semaphore(channel.channel_type)
+        window = concurrency or cls._concurrency_limits.get(channel.channel_type, 10)
+        
+        async def deliver(recipient: str, content: WishContent) -> SendResult:
+            async with semaphore:
+                try:
+                    result = await channel.send(recipient, content)
+                except Exception as e:
+                    logger.error(f"Failed to send {channel_type} to {recipient}: {e}")
+                    result = SendResult(success=False, error=str(e))
+            result.recipient = recipient
+            result.wish_id = content.wish_id
+            return result
+        
+        pending = set()
+        try:
+            for recipient, content in deliveries:
+                pending.add(asyncio.ensure_future(deliver(recipient, content)))
+                if len(pending) >= window:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        yield task.result()
+            
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            # Consumer stopped early: don't leave sends running unobserved
+            for task in pending:
+                task.cancel()
+
+
+
+def _collect_metrics() -> List[MetricFamily]:
+    """Channel queues and breaker states, read at scrape time"""
+    queue_depth = MetricFamily(
+        "festwish_channel_queue_depth", "gauge", "Sends waiting for a rate-limit token"
+    )
+    in_flight = MetricFamily(
+        "festwish_channel_sends_in_flight", "gauge", "Sends currently with the provider"
+    )
+    circuit_state = MetricFamily(
+        "festwish_channel_circuit_state", "gauge", "Current circuit breaker state (1 for the active state)"
+    )
+    for channel_type, metrics in MessageChannelFactory.get_channel_metrics().items():
+        queue_depth.add(metrics["queue_depth"], channel=channel_type)
+        in_flight.add(metrics["in_flight"], channel=channel_type)
+        circuit_state.add(1, channel=channel_type, state=metrics["circuit_state"])
+    return [queue_depth, in_flight, circuit_state]
+
+
+registry.register_collector(_collect_metrics)
+registry.register_cache("payload", lambda: (payload_cache.hits, payload_cache.misses))
@@ -0,0 +1,200 @@
+"""
+Festival Search
+---------------
+In-memory full-text search over the catalog: an inverted index of festival
+names, descriptions, traditions and quotes, ranked with BM25.
+
+The last query term also matches as a prefix ("diwa" finds "diwali"), using
+a binary search over the sorted vocabulary, so the same endpoint serves
+autocomplete. The index is rebuilt in the background whenever a new catalog
+version loads; each festival's terms are only re-tokenized if its indexed
+text changed.
+"""
+
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+
+from app.services.catalog_service import CatalogSnapshot, catalog_cache
+
+logger = logging.getLogger(__name__)
+
+# Term weight per source field: a name match outranks a quote match
+FIELD_WEIGHTS = (
+    ("name", 3.0),
+    ("religion_culture", 1.5),
+    ("typical_month", 1.0),
+    ("description", 1.0),
+    ("traditions", 1.0),
+    ("cultural_significance", 0.5),
+)
+QUOTE_WEIGHT = 0.5
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Prefix matches score a little below the exact term
+PREFIX_WEIGHT = 0.8
+MAX_PREFIX_EXPANSIONS = 32
+MAX_QUERY_TERMS = 10
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the this to with".split()
+)
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase, accent-folded word tokens without stopwords"""
+    if not text:
+        return []
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return [t for t in _TOKEN.findall(folded) if t not in STOPWORDS]
+
+
+@dataclass
+class _Document:
+    """Weighted term frequencies of one festival"""
+    fingerprint: int
+    terms: Dict[str, float]
+    length: float
+
+
+def _document_text(festival: dict, quotes: Iterable[dict]) -> Tuple[Tuple[str, float], ...]:
+    texts = [(festival.get(name) or "", weight) for name, weight in FIELD_WEIGHTS]
+    texts.extend((quote.get("quote_text") or "", QUOTE_WEIGHT) for quote in quotes)
+    return tuple(texts)
+
+
+def _build_document(texts: Tuple[Tuple[str, float], ...]) -> _Document:
+    terms: Counter = Counter()
+    for text, weight in texts:
+        for token in tokenize(text):
+            terms[token] += weight
+    return _Document(fingerprint=hash(texts), terms=dict(terms), length=sum(terms.values()))
+
+
+class SearchIndex:
+    """Inverted index for one catalog version"""
+
+    def __init__(self, version: str, documents: Dict[str, _Document]):
+        self.version = version
+        self.documents = documents
+        self.postings: Dict[str, List[Tuple[str, float]]] = {}
+        for festival_id, document in documents.items():
+            for term, frequency in document.terms.items():
+                self.postings.setdefault(term, []).append((festival_id, frequency))
+        self.vocabulary = sorted(self.postings)
+        self.average_length = (
+            sum(d.length for d in documents.values()) / len(documents) if documents else 0.0
+        )
+
+    @classmethod
+    def build(cls, catalog: CatalogSnapshot, previous: Optional["SearchIndex"] = None) -> "SearchIndex":
+        """Index a catalog, reusing unchanged festivals' terms from the previous index"""
+        reused = 0
+        documents = {}
+        for festival in catalog.festivals:
+            texts = _document_text(festival, catalog.quotes_by_festival.get(festival["id"], []))
+            document = previous.documents.get(festival["id"]) if previous else None
+            if document is not None and document.fingerprint == hash(texts):
+                reused += 1
+            else:
+                document = _build_document(texts)
+            documents[festival["id"]] = document
+
+        index = cls(catalog.version, documents)
+        logger.info(
+            f"Built search index for catalog {catalog.version}: {len(index.vocabulary)} terms, "
+            f"{len(documents) - reused} festivals re-tokenized"
+        )
+        return index
+
+    def _idf(self, term: str) -> float:
+        matches = len(self.postings[term])
+        return math.log(1 + (len(self.documents) - matches + 0.5) / (matches + 0.5))
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        """Vocabulary terms starting with prefix (the vocabulary is sorted)"""
+        terms = []
+        position = bisect_left(self.vocabulary, prefix)
+        while position < len(self.vocabulary) and len(terms) < MAX_PREFIX_EXPANSIONS:
+            term = self.vocabulary[position]
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+            position += 1
+        return terms
+
+    def search(self, query: str, limit: int = 10, prefix: bool = True) -> List[Tuple[str, float]]:
+        """(festival id, score) pairs, best first; the last term also matches as a prefix"""
+        tokens = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+        if not tokens:
+            return []
+
+        # term -> weight; the exact term wins over its own prefix expansion
+        weighted: Dict[str, float] = {}
+        if prefix:
+            for term in self._prefix_terms(tokens[-1]):
+                weighted[term] = PREFIX_WEIGHT
+        for token in tokens:
+            if token in self.postings:
+                weighted[token] = 1.0
+
+        scores: Dict[str, float] = {}
+        for term, weight in weighted.items():
+            idf = self._idf(term) * weight
+            for festival_id, frequency in self.postings[term]:
+                length = self.documents[festival_id].length
+                norm = K1 * (1 - B + B * length / self.average_length)
+                scores[festival_id] = scores.get(festival_id, 0.0) + idf * frequency * (K1 + 1) / (frequency + norm)
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+class FestivalSearch:
+    """Keeps the search index in step with the catalog version"""
+
+    def __init__(self):
+        self._index: Optional[SearchIndex] = None
+        self._build_lock = threading.Lock()
+
+    def index_for(self, catalog: CatalogSnapshot) -> SearchIndex:
+        """
+        Index for this catalog version, rebuilt (incrementally) on version change.
+        Normally already built by the catalog load listener; the lock keeps a
+        search that races the listener from building the same index twice.
+        """
+        index = self._index
+        if index is not None and index.version == catalog.version:
+            return index
+        with self._build_lock:
+            if self._index is None or self._index.version != catalog.version:
+                started = time.perf_counter()
+                self._index = SearchIndex.build(catalog, self._index)
+                logger.debug(f"Search index built in {(time.perf_counter() - started) * 1000:.1f}ms")
+            return self._index
+
+    def search(
+        self, catalog: CatalogSnapshot, query: str, fields: Sequence[str], limit: int = 10
+    ) -> List[dict]:
+        """Matching festivals projected to fields, best first, each with its score"""
+        hits = self.index_for(catalog).search(query, limit)
+        rows = catalog.festival_list(fields, [catalog.festivals_by_id[fid] for fid, _ in hits])
+        for row, (_, score) in zip(rows, hits):
+            row["score"] = round(score, 4)
+        return rows
+
+
+festival_search = FestivalSearch()
+
+# Build each new version's index when it loads, not on its first search
+catalog_cache.on_load(festival_search.index_for)
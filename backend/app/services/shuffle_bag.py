@@ -0,0 +1,108 @@
+"""
+Shuffle Bags
+------------
+Non-repeating rotation through a pool of content ("shuffle" on the wish
+page): each bag hands out every item of its pool once, in a random order,
+before any repeats; then it starts a new order.
+
+A bag stores no list. Its state is a seed and a draw counter; the order is
+a keyed pseudo-random permutation of ``range(size)`` (a small Feistel
+network with cycle walking), so the n-th draw is computed directly. Bags
+are kept per owner (user or browser session) in a bounded LRU.
+"""
+
+from collections import OrderedDict
+from typing import Hashable, List, Optional
+import random
+import threading
+
+from app.core.config import settings
+from app.core.metrics import MetricFamily, registry
+
+_MASK64 = (1 << 64) - 1
+FEISTEL_ROUNDS = 4
+
+
+def _mix(value: int) -> int:
+    """64-bit finalizer (splitmix64)"""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def permute(index: int, size: int, key: int) -> int:
+    """Position index of a keyed pseudo-random permutation of range(size)"""
+    if size <= 1:
+        return 0
+    half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+    half_mask = (1 << half_bits) - 1
+
+    value = index
+    while True:
+        # Feistel network over 2 * half_bits bits: a bijection on [0, 4^half_bits)
+        left, right = value >> half_bits, value & half_mask
+        for round_number in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ (_mix(key ^ (round_number << 56) ^ right) & half_mask)
+        value = (left << half_bits) | right
+        # Cycle walking: re-apply until the value lands inside range(size)
+        if value < size:
+            return value
+
+
+class ShuffleBags:
+    """Per-key bags of (seed, draws so far), least recently used evicted first"""
+
+    def __init__(self, max_bags: int):
+        self.max_bags = max_bags
+        self._bags: "OrderedDict[Hashable, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._bags)
+
+    def draw(self, key: Hashable, size: int) -> Optional[int]:
+        """Next index into a pool of size items; None for an empty pool"""
+        if size <= 0:
+            return None
+
+        with self._lock:
+            state = self._bags.get(key)
+            if state is None:
+                state = self._bags[key] = [random.getrandbits(64), 0]
+                if len(self._bags) > self.max_bags:
+                    self._bags.popitem(last=False)
+            else:
+                self._bags.move_to_end(key)
+            seed, drawn = state
+            state[1] += 1
+
+        if size == 2:
+            # Only one order avoids back-to-back repeats: alternate
+            return (permute(0, 2, _mix(seed)) + drawn) % 2
+
+        # A new permutation for each pass through the pool
+        cycle, position = divmod(drawn, size)
+        key = _mix(seed + cycle)
+        if cycle and position < 2:
+            # Don't hand out the previous pass's last item again straight away
+            if permute(0, size, key) == permute(size - 1, size, _mix(seed + cycle - 1)):
+                position = 1 - position
+        return permute(position, size, key)
+
+    def pick(self, key: Hashable, pool: List[dict]) -> Optional[dict]:
+        """Next item of pool for key"""
+        index = self.draw(key, len(pool))
+        return None if index is None else pool[index]
+
+
+content_bags = ShuffleBags(settings.SHUFFLE_BAG_MAX_BAGS)
+
+
+def _collect_metrics():
+    yield MetricFamily(
+        "festwish_shuffle_bags", "gauge", "Content rotation bags held in memory"
+    ).add(len(content_bags))
+
+
+registry.register_collector(_collect_metrics)
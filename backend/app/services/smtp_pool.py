@@ -0,0 +1,144 @@
+"""
+SMTP Connection Pool
+--------------------
+A fixed-size pool of persistent SMTP sessions for the email channel.
+
+Opening a session costs a TCP handshake, STARTTLS and AUTH; at festival
+volume that dominates the send time. Sessions are opened lazily, reused for
+many messages back to back, checked with NOOP after sitting idle, and
+reopened transparently if the server dropped them.
+
+``smtplib`` is blocking, so each send runs in a worker thread while holding
+one pooled session; up to ``size`` messages are in flight at once.
+"""
+
+from email.message import EmailMessage
+from typing import List, Optional
+import asyncio
+import logging
+import smtplib
+import ssl
+import time
+
+logger = logging.getLogger(__name__)
+
+# Sessions idle longer than this are checked with NOOP before reuse
+IDLE_CHECK_SECONDS = 30.0
+
+
+class _PooledSession:
+    """An SMTP session and when it was last used"""
+
+    def __init__(self):
+        self.smtp: Optional[smtplib.SMTP] = None
+        self.last_used = 0.0
+
+
+class SMTPConnectionPool:
+    """Pool of persistent SMTP sessions shared by concurrent sends"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        size: int = 4,
+        timeout: float = 10.0
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        self._sessions: Optional[asyncio.Queue] = None
+        self._all: List[_PooledSession] = []
+
+    def _get_queue(self) -> asyncio.Queue:
+        if self._sessions is None:
+            self._sessions = asyncio.Queue()
+            for _ in range(self.size):
+                session = _PooledSession()
+                self._all.append(session)
+                self._sessions.put_nowait(session)
+        return self._sessions
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        smtp.ehlo()
+        if self.use_tls:
+            smtp.starttls(context=ssl.create_default_context())
+            smtp.ehlo()
+        if self.username:
+            smtp.login(self.username, self.password or "")
+        return smtp
+
+    def _close_session(self, session: _PooledSession) -> None:
+        if session.smtp is not None:
+            try:
+                session.smtp.quit()
+            except Exception:
+                pass
+            session.smtp = None
+
+    def _ensure_connected(self, session: _PooledSession) -> None:
+        if session.smtp is not None and time.monotonic() - session.last_used > IDLE_CHECK_SECONDS:
+            try:
+                if session.smtp.noop()[0] != 250:
+                    self._close_session(session)
+            except (smtplib.SMTPException, OSError):
+                # Half-dead socket: drop it without a QUIT and reconnect
+                try:
+                    session.smtp.close()
+                except OSError:
+                    pass
+                session.smtp = None
+        if session.smtp is None:
+            session.smtp = self._connect()
+
+    def _send_blocking(self, session: _PooledSession, message: EmailMessage) -> None:
+        self._ensure_connected(session)
+        try:
+            session.smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # The server closed an idle session: reconnect once and retry
+            session.smtp = self._connect()
+            session.smtp.send_message(message)
+        except smtplib.SMTPException:
+            # Leave the session clean for the next message
+            try:
+                session.smtp.rset()
+            except smtplib.SMTPException:
+                self._close_session(session)
+            raise
+        finally:
+            session.last_used = time.monotonic()
+
+    async def send(self, message: EmailMessage) -> None:
+        """Send a message over a pooled session"""
+        queue = self._get_queue()
+        session = await queue.get()
+        sending = asyncio.ensure_future(asyncio.to_thread(self._send_blocking, session, message))
+
+        def return_session(future: asyncio.Future) -> None:
+            if not future.cancelled():
+                future.exception()  # Retrieved here if the caller was cancelled
+            queue.put_nowait(session)
+
+        # Cancelling the caller cannot stop the thread, so the session only
+        # goes back to the pool once the thread is done with it
+        sending.add_done_callback(return_session)
+        await asyncio.shield(sending)
+
+    @property
+    def idle(self) -> int:
+        """Sessions not currently sending"""
+        return self._sessions.qsize() if self._sessions else self.size
+
+    async def close(self) -> None:
+        """Close every open session"""
+        for session in self._all:
+            await asyncio.to_thread(self._close_session, session)
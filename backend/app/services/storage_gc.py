@@ -0,0 +1,198 @@
+"""
+Storage Garbage Collector
+=========================
+Reconciles storage prefixes against the database and removes objects
+that no row references:
+
+- ``generated_cards/{wish_id}.jpg`` against ``generated_wishes``
+- ``user_uploads/{user_id}/...`` against ``user_uploaded_images.storage_path``
+
+Objects newer than the grace period are never collected, so uploads whose
+database row has not been written yet are left alone.
+
+Usage:
+    python -m app.services.storage_gc --dry-run
+    python -m app.services.storage_gc --prefix user_uploads --batch-size 200
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set
+import argparse
+import logging
+import time
+
+from app.core.database import get_supabase_admin
+from app.core.storage import StorageBackend, get_storage, DEFAULT_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+CARDS_PREFIX = "generated_cards"
+UPLOADS_PREFIX = "user_uploads"
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_GRACE_SECONDS = 3600
+
+
+@dataclass
+class GCReport:
+    """Outcome of a garbage collection run for one prefix"""
+    prefix: str
+    dry_run: bool
+    scanned: int = 0
+    referenced: int = 0
+    orphaned: int = 0
+    removed: int = 0
+    skipped_recent: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+    orphans: List[str] = field(default_factory=list)
+
+    @property
+    def objects_per_second(self) -> float:
+        return self.scanned / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def summary(self) -> str:
+        action = "would remove" if self.dry_run else "removed"
+        return (
+            f"{self.prefix}: scanned {self.scanned} objects "
+            f"({self.objects_per_second:.0f}/s), {self.referenced} referenced, "
+            f"{self.orphaned} orphaned, {action} "
+            f"{self.orphaned if self.dry_run else self.removed}, "
+            f"{self.skipped_recent} too recent, {self.failed} failed"
+        )
+
+
+class StorageGarbageCollector:
+    """Batch job removing storage objects not referenced by the database"""
+
+    def __init__(
+        self,
+        storage: Optional[StorageBackend] = None,
+        client=None,
+        dry_run: bool = False,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        grace_seconds: int = DEFAULT_GRACE_SECONDS
+    ):
+        self.storage = storage or get_storage()
+        self.client = client or get_supabase_admin()
+        self.dry_run = dry_run
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.grace_seconds = grace_seconds
+        self._reference_loaders: Dict[str, Callable[[], Set[str]]] = {
+            CARDS_PREFIX: self._card_references,
+            UPLOADS_PREFIX: self._upload_references,
+        }
+
+    def _fetch_column(self, table: str, column: str, not_null: Optional[str] = None) -> List[dict]:
+        """Read one column of a table page by page"""
+        rows = []
+        offset = 0
+        while True:
+            query = self.client.table(table).select(column).order("id")
+            if not_null:
+                query = query.not_.is_(not_null, "null")
+            result = query.range(offset, offset + self.page_size - 1).execute()
+            rows.extend(result.data)
+            if len(result.data) < self.page_size:
+                return rows
+            offset += self.page_size
+
+    def _card_references(self) -> Set[str]:
+        rows = self._fetch_column("generated_wishes", "id", not_null="generated_card_url")
+        return {f"{CARDS_PREFIX}/{row['id']}.jpg" for row in rows}
+
+    def _upload_references(self) -> Set[str]:
+        rows = self._fetch_column("user_uploaded_images", "storage_path")
+        return {row["storage_path"] for row in rows}
+
+    def _remove(self, paths: List[str], report: GCReport) -> None:
+        for start in range(0, len(paths), self.batch_size):
+            batch = paths[start:start + self.batch_size]
+            try:
+                self.storage.remove(batch)
+                report.removed += len(batch)
+            except Exception as e:
+                logger.error(f"Failed to remove batch of {len(batch)} objects: {e}")
+                report.failed += len(batch)
+
+    def collect(self, prefix: str) -> GCReport:
+        """Collect orphans under one prefix"""
+        loader = self._reference_loaders.get(prefix)
+        if not loader:
+            raise ValueError(f"Unknown storage prefix: {prefix}")
+
+        report = GCReport(prefix=prefix, dry_run=self.dry_run)
+        started = time.perf_counter()
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.grace_seconds)
+
+        # Load references before listing: anything uploaded after this point
+        # is newer than the cutoff and therefore skipped
+        references = loader()
+
+        pending: List[str] = []
+        for page in self.storage.list(prefix, self.page_size):
+            report.scanned += len(page)
+            paths = {obj.path for obj in page}
+            recent = {
+                obj.path for obj in page
+                if obj.updated_at is None or obj.updated_at > cutoff
+            }
+            orphans = paths - references - recent
+
+            report.referenced += len(paths & references)
+            report.skipped_recent += len(recent - references)
+            report.orphaned += len(orphans)
+
+            if self.dry_run:
+                report.orphans.extend(sorted(orphans))
+                continue
+
+            pending.extend(sorted(orphans))
+            if len(pending) >= self.batch_size:
+                flush_count = len(pending) - len(pending) % self.batch_size
+                self._remove(pending[:flush_count], report)
+                pending = pending[flush_count:]
+
+        if pending:
+            self._remove(pending, report)
+
+        report.elapsed_seconds = time.perf_counter() - started
+        logger.info(report.summary())
+        return report
+
+    def run(self, prefixes: Optional[List[str]] = None) -> List[GCReport]:
+        """Collect orphans under each prefix"""
+        return [self.collect(prefix) for prefix in prefixes or list(self._reference_loaders)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove orphaned storage objects")
+    parser.add_argument("--dry-run", action="store_true", help="Report orphans without removing them")
+    parser.add_argument("--prefix", action="append", choices=[CARDS_PREFIX, UPLOADS_PREFIX],
+                        help="Prefix to collect (repeatable, default: all)")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--grace-seconds", type=int, default=DEFAULT_GRACE_SECONDS)
+    args = parser.parse_args()
+
+    from app.core.logging import setup_logging
+    setup_logging()
+
+    collector = StorageGarbageCollector(
+        dry_run=args.dry_run,
+        page_size=args.page_size,
+        batch_size=args.batch_size,
+        grace_seconds=args.grace_seconds
+    )
+
+    for report in collector.run(args.prefix):
+        print(report.summary())
+        for path in report.orphans:
+            print(f"  - {path}")
+
+
+if __name__ == "__main__":
+    main()
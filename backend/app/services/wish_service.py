@@ -1,14 +1,60 @@
-from typing import Optional
+from typing import Any, List, Optional, Sequence, Tuple
 from uuid import UUID
+from datetime import datetime, timezone
+from postgrest.exceptions import APIError
 from app.core.database import get_supabase_admin
 from app.core.exceptions import NotFoundException, ValidationException
+from app.core.pagination import DEFAULT_PAGE_SIZE, apply_keyset, paginate
+from app.services.catalog_service import get_catalog
 from app.services.festival_service import FestivalService
 from app.services.relationship_service import RelationshipService
 from app.services.card_service import CardService
+from app.services.messaging import MessageChannelFactory
+import asyncio
 import logging
+import math
+import random
 
 logger = logging.getLogger(__name__)
 
+MAX_PREVIEW_BATCH = 20
+
+# A wish plus what its card is drawn from, via PostgREST embedding on the foreign keys
+CARD_SOURCE_COLUMNS = (
+    "*, image:festival_images(image_url), quote:festival_quotes(quote_text), "
+    "user_image:user_uploaded_images(image_url)"
+)
+
+
+def _wish_error(error: APIError) -> Optional[Exception]:
+    """The API exception for a create_wish database error, if it maps to one"""
+    if error.code == "P0002":  # no_data_found: DETAIL is the resource, HINT the id
+        return NotFoundException(error.details or "Resource", error.hint)
+    if error.code == "22023":  # invalid_parameter_value
+        return ValidationException(error.message)
+    if error.code == "23503":  # foreign_key_violation, e.g. an unknown user_image_id
+        return ValidationException(f"Invalid reference: {error.details or error.message}")
+    return None
+
+
+def sample_combinations(pools: Sequence[Sequence[Any]], count: int) -> List[Tuple[Any, ...]]:
+    """
+    Up to count distinct combinations, one item from each pool, sampled
+    without replacement from the product of the pools (an empty pool
+    contributes None). Only the sampled combinations are materialized.
+    """
+    pools = [list(pool) or [None] for pool in pools]
+    total = math.prod(len(pool) for pool in pools)
+    
+    combinations = []
+    for index in random.sample(range(total), min(count, total)):
+        combination = []
+        for pool in pools:
+            index, position = divmod(index, len(pool))
+            combination.append(pool[position])
+        combinations.append(tuple(combination))
+    return combinations
+
 
 class WishService:
     def __init__(self):
@@ -26,66 +72,55 @@ class WishService:
         recipient_name: Optional[str] = None,
         custom_message: Optional[str] = None,
         user_image_id: Optional[UUID] = None,
-        channel_type: str = "download"
+        channel_type: str = "download",
+        recipient_contact: Optional[str] = None,
+        scheduled_at: Optional[datetime] = None
     ) -> dict:
-        """Create a new wish with random or custom content"""
+        """
+        Create a new wish with random or custom content
         
-        # Verify festival and relationship exist
-        festival = await self.festival_service.get_by_id(festival_id)
-        relationship = await self.relationship_service.get_by_id(relationship_id)
+        The festival and relationship checks, the random picks and the insert
+        run in the create_wish database function: one round-trip, one
+        transaction. When a recipient_contact is given for a sending channel, the insert
+        also enqueues the delivery in wish_outbox (same transaction, via
+        trigger); the delivery workers send it in the background, or from
+        scheduled_at onwards when that is set.
+        """
         
-        # Get message (custom or random)
-        message_id = None
-        if custom_message:
-            final_message = custom_message
-        else:
-            random_message = await self.festival_service.get_random_message(
-                festival_id, relationship_id
-            )
-            if random_message:
-                final_message = random_message.get("message_text", "")
-                message_id = random_message.get("id")
-            else:
+        try:
+            MessageChannelFactory.get_channel(channel_type)
+        except ValueError as e:
+            raise ValidationException(str(e))
+        
+        if scheduled_at:
+            if channel_type == "download" or not recipient_contact:
                 raise ValidationException(
-                    f"No messages available for {festival['name']} - {relationship['display_name']}"
+                    "Scheduled delivery requires a sending channel and recipient_contact"
                 )
+            if scheduled_at.tzinfo is None:
+                scheduled_at = scheduled_at.replace(tzinfo=timezone.utc)
+            if scheduled_at <= datetime.now(timezone.utc):
+                raise ValidationException("scheduled_at must be in the future")
         
-        # Get random image (if user didn't provide one)
-        image_id = None
-        if not user_image_id:
-            random_image = await self.festival_service.get_random_image(festival_id)
-            if random_image:
-                image_id = random_image.get("id")
-        
-        # Get random quote
-        quote_id = None
-        random_quote = await self.festival_service.get_random_quote(festival_id)
-        if random_quote:
-            quote_id = random_quote.get("id")
-        
-        # Create wish record
-        wish_data = {
-            "festival_id": str(festival_id),
-            "relationship_id": str(relationship_id),
-            "recipient_name": recipient_name,
-            "custom_message": custom_message,
-            "final_message": final_message,
-            "channel_type": channel_type,
-            "sent_status": "pending"
-        }
-        
-        if user_id:
-            wish_data["user_id"] = str(user_id)
-        if message_id:
-            wish_data["message_id"] = str(message_id)
-        if image_id:
-            wish_data["image_id"] = str(image_id)
-        if user_image_id:
-            wish_data["user_image_id"] = str(user_image_id)
-        if quote_id:
-            wish_data["quote_id"] = str(quote_id)
-        
-        result = self.client.table(self.table).insert(wish_data).execute()
+        # Validation, random picks and the insert happen in one database call
+        query = self.client.rpc("create_wish", {
+            "p_festival_id": str(festival_id),
+            "p_relationship_id": str(relationship_id),
+            "p_user_id": str(user_id) if user_id else None,
+            "p_recipient_name": recipient_name,
+            "p_custom_message": custom_message,
+            "p_user_image_id": str(user_image_id) if user_image_id else None,
+            "p_channel_type": channel_type,
+            "p_recipient_contact": recipient_contact,
+            "p_scheduled_at": scheduled_at.isoformat() if scheduled_at else None
+        })
+        try:
+            result = await asyncio.to_thread(query.execute)
+        except APIError as e:
+            mapped = _wish_error(e)
+            if mapped is None:
+                raise
+            raise mapped from e
         
         if not result.data:
             raise ValidationException("Failed to create wish")
@@ -105,17 +140,34 @@ class WishService:
         
         return result.data
     
-    async def get_user_wishes(self, user_id: UUID, limit: int = 50) -> list:
-        """Get all wishes for a user"""
-        result = self.client.table(self.table)\
-            .select("*")\
-            .eq("user_id", str(user_id))\
-            .order("created_at", desc=True)\
-            .limit(limit)\
-            .execute()
+    async def get_wish_for_card(self, wish_id: UUID) -> dict:
+        """Get a wish with its image URL and quote text embedded, in one query"""
+        query = self.client.table(self.table)\
+            .select(CARD_SOURCE_COLUMNS)\
+            .eq("id", str(wish_id))\
+            .single()
+        result = await asyncio.to_thread(query.execute)
+        
+        if not result.data:
+            raise NotFoundException("Wish", str(wish_id))
         
         return result.data
     
+    async def get_user_wishes(
+        self,
+        user_id: UUID,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Tuple[list, Optional[str]]:
+        """Get a page of wishes for a user, newest first"""
+        query = self.client.table(self.table)\
+            .select("*")\
+            .eq("user_id", str(user_id))
+        
+        result = apply_keyset(query, limit, cursor).execute()
+        
+        return paginate(result.data, limit)
+    
     async def generate_preview(
         self,
         festival_id: UUID,
@@ -154,6 +206,54 @@ class WishService:
             "recipient_name": recipient_name
         }
     
+    async def generate_preview_batch(
+        self,
+        festival_id: UUID,
+        relationship_id: UUID,
+        count: int,
+        custom_message: Optional[str] = None,
+        recipient_name: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Generate up to count distinct previews (message, image, quote) without saving.
+        Festival, relationship, images and quotes come from the catalog; the
+        messages for the combo are read once.
+        """
+        catalog = await get_catalog()
+        
+        festival = catalog.festivals_by_id.get(str(festival_id))
+        if festival:
+            images = catalog.images_by_festival.get(festival["id"], [])
+            quotes = catalog.quotes_by_festival.get(festival["id"], [])
+        else:
+            # Not in the catalog snapshot (inactive or added since)
+            festival = await self.festival_service.get_by_id(festival_id)
+            images = await self.festival_service.get_images(festival_id)
+            quotes = await self.festival_service.get_quotes(festival_id)
+        
+        relationship = catalog.relationships_by_id.get(str(relationship_id))
+        if not relationship:
+            relationship = await self.relationship_service.get_by_id(relationship_id)
+        
+        if custom_message:
+            messages = [custom_message]
+        else:
+            rows = await self.festival_service.get_messages(festival_id, relationship_id)
+            messages = [row["message_text"] for row in rows]
+        
+        return [
+            {
+                "message_text": message_text or "",
+                "image_url": image["image_url"] if image else "",
+                "quote_text": quote["quote_text"] if quote else None,
+                "quote_author": quote.get("author") if quote else None,
+                "festival_name": festival["name"],
+                "relationship_name": relationship["display_name"],
+                "recipient_name": recipient_name
+            }
+            for message_text, image, quote in sample_combinations([messages, images, quotes], count)
+        ]
+    
     async def update_card_url(self, wish_id: UUID, card_url: str) -> dict:
         """Update the generated card URL for a wish"""
         result = self.client.table(self.table)\
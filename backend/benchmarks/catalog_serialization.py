@@ -0,0 +1,124 @@
+"""
+Catalog Serialization Benchmark
+===============================
+Compares the ways a FestivalDetail body can be produced:
+
+- stdlib:      response_model validation + jsonable_encoder + json (FastAPI's JSONResponse)
+- orjson:      response_model validation + ORJSONResponse
+- pre-encoded: CatalogSnapshot.encoded lookup (what the catalog endpoints serve)
+
+and then requests /festivals/slug/{slug} end to end through the ASGI app.
+Uses the seed festivals with synthetic quotes and images; no database is needed.
+
+Usage:
+    python -m benchmarks.catalog_serialization
+    python -m benchmarks.catalog_serialization --iterations 20000
+"""
+
+from datetime import datetime, timezone
+from uuid import uuid4
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.main import app
+from app.schemas.festivals import FestivalDetail
+from app.services import catalog_service
+from app.services.catalog_service import CatalogCache
+from seeds.seed_festivals import FESTIVALS
+
+
+def build_catalog() -> dict:
+    now = datetime.now(timezone.utc).isoformat()
+    festivals, quotes, images = [], [], []
+    for festival in FESTIVALS:
+        festival_id = str(uuid4())
+        festivals.append({**festival, "id": festival_id, "is_active": True, "created_at": now})
+        for i in range(10):
+            quotes.append({
+                "id": str(uuid4()), "festival_id": festival_id, "created_at": now,
+                "quote_text": f"{festival['name']} quote {i}: " + festival["description"][:120],
+                "author": "Anonymous", "source": None, "is_active": True
+            })
+        for i in range(4):
+            images.append({
+                "id": str(uuid4()), "festival_id": festival_id, "created_at": now,
+                "image_url": f"https://example.com/{festival['slug']}/{i}.jpg",
+                "alt_text": f"{festival['name']} image {i}", "is_card_template": i == 0,
+                "is_active": True
+            })
+    return {"festivals": festivals, "relationships": [], "quotes": quotes, "images": images}
+
+
+def bench(label: str, fn, iterations: int) -> None:
+    fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<14} {elapsed / iterations * 1e6:9.1f} us/op")
+
+
+async def bench_http(slug: str, requests: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        url = f"/api/v1/festivals/slug/{slug}"
+        response = await client.get(url)
+        response.raise_for_status()
+        etag = response.headers["etag"]
+
+        for label, headers in (("200 OK", {}), ("304 Not Mod.", {"If-None-Match": etag})):
+            started = time.perf_counter()
+            for _ in range(requests):
+                await client.get(url, headers=headers)
+            elapsed = time.perf_counter() - started
+            print(f"{label:<14} {elapsed / requests * 1e6:9.1f} us/req ({requests / elapsed:.0f} req/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark catalog response serialization")
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    data = build_catalog()
+    cache = CatalogCache(ttl_seconds=3600)
+    cache._fetch = lambda: data
+    catalog_service.catalog_cache = cache
+    snapshot = asyncio.run(cache.load())
+
+    festival = snapshot.festivals[0]
+    detail = snapshot.festival_detail(festival["id"])
+    key = f"festival:{festival['id']}"
+    size = len(snapshot.encoded(key, lambda: FestivalDetail.model_validate(detail).model_dump(mode="json")))
+    print(f"FestivalDetail for {festival['slug']}: {size} bytes\n")
+
+    bench(
+        "stdlib",
+        lambda: JSONResponse(jsonable_encoder(FestivalDetail.model_validate(detail))).body,
+        args.iterations
+    )
+    bench(
+        "orjson",
+        lambda: ORJSONResponse(FestivalDetail.model_validate(detail).model_dump(mode="json")).body,
+        args.iterations
+    )
+    bench(
+        "pre-encoded",
+        lambda: snapshot.encoded(key, lambda: None),
+        args.iterations
+    )
+    print()
+    asyncio.run(bench_http(festival["slug"], args.requests))
+
+
+if __name__ == "__main__":
+    main()
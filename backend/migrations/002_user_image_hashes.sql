@@ -0,0 +1,22 @@
+-- FestWish Database Schema
+-- Migration 002: Content and perceptual hashes for user uploads
+
+-- =====================================================
+-- USER UPLOADED IMAGES - DEDUPLICATION HASHES
+-- =====================================================
+-- content_hash: SHA-256 of the uploaded bytes (exact duplicates)
+-- perceptual_hash: 64-bit difference hash as hex (re-encoded copies); only
+--   a candidate signal, confirmed by width/height and Hamming distance
+-- perceptual_bands: the hash cut into 5 position-tagged bands ("0:1a2b");
+--   hashes within 4 bits share at least one, so the GIN index finds every
+--   near-duplicate candidate
+ALTER TABLE user_uploaded_images ADD COLUMN content_hash VARCHAR(64);
+ALTER TABLE user_uploaded_images ADD COLUMN perceptual_hash VARCHAR(16);
+ALTER TABLE user_uploaded_images ADD COLUMN perceptual_bands TEXT[];
+ALTER TABLE user_uploaded_images ADD COLUMN width INTEGER;
+ALTER TABLE user_uploaded_images ADD COLUMN height INTEGER;
+
+CREATE UNIQUE INDEX idx_user_images_content_hash
+    ON user_uploaded_images(user_id, content_hash);
+CREATE INDEX idx_user_images_perceptual_bands
+    ON user_uploaded_images USING GIN (perceptual_bands);
@@ -0,0 +1,20 @@
+-- FestWish Database Schema
+-- Migration 003: Keyset pagination indexes for user history
+
+-- =====================================================
+-- USER UPLOADED IMAGES - (user_id, created_at, id) KEYSET
+-- =====================================================
+CREATE INDEX idx_user_images_user_created
+    ON user_uploaded_images(user_id, created_at DESC, id DESC);
+
+-- Superseded by the composite index above
+DROP INDEX IF EXISTS idx_user_images_user;
+
+-- =====================================================
+-- GENERATED WISHES - (user_id, created_at, id) KEYSET
+-- =====================================================
+CREATE INDEX idx_generated_wishes_user_created
+    ON generated_wishes(user_id, created_at DESC, id DESC);
+
+-- Superseded by the composite index above
+DROP INDEX IF EXISTS idx_generated_wishes_user;
@@ -0,0 +1,146 @@
+-- FestWish Database Schema
+-- Migration 004: Transactional outbox for wish delivery
+
+-- Contact address (phone number or email) for channels that send
+ALTER TABLE generated_wishes ADD COLUMN recipient_contact TEXT;
+
+-- =====================================================
+-- WISH OUTBOX TABLE (one delivery per sendable wish)
+-- =====================================================
+CREATE TABLE wish_outbox (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    wish_id UUID NOT NULL UNIQUE REFERENCES generated_wishes(id) ON DELETE CASCADE,
+    channel_type VARCHAR(20) NOT NULL,
+    recipient TEXT NOT NULL,
+    status VARCHAR(20) DEFAULT 'pending', -- pending, processing, sent, dead
+    attempts INTEGER DEFAULT 0,
+    next_attempt_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    locked_by VARCHAR(100),
+    locked_until TIMESTAMP WITH TIME ZONE,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX idx_wish_outbox_pending ON wish_outbox(next_attempt_at)
+    WHERE status = 'pending';
+CREATE INDEX idx_wish_outbox_processing ON wish_outbox(locked_until)
+    WHERE status = 'processing';
+
+CREATE TRIGGER update_wish_outbox_updated_at
+    BEFORE UPDATE ON wish_outbox
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- =====================================================
+-- ENQUEUE IN THE SAME TRANSACTION AS THE WISH INSERT
+-- =====================================================
+CREATE OR REPLACE FUNCTION enqueue_wish_delivery()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO wish_outbox (wish_id, channel_type, recipient)
+    VALUES (NEW.id, NEW.channel_type, NEW.recipient_contact);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER enqueue_generated_wish_delivery
+    AFTER INSERT ON generated_wishes
+    FOR EACH ROW
+    WHEN (NEW.recipient_contact IS NOT NULL AND NEW.channel_type <> 'download')
+    EXECUTE FUNCTION enqueue_wish_delivery();
+
+-- =====================================================
+-- FUNCTIONS FOR DELIVERY WORKERS
+-- =====================================================
+
+-- Claim a batch of due deliveries (and expired leases) for one worker
+CREATE OR REPLACE FUNCTION claim_wish_outbox(
+    p_worker_id TEXT,
+    p_batch_size INTEGER,
+    p_lease_seconds INTEGER
+) RETURNS TABLE (
+    id UUID,
+    wish_id UUID,
+    channel_type VARCHAR(20),
+    recipient TEXT,
+    attempts INTEGER,
+    recipient_name VARCHAR(255),
+    final_message TEXT,
+    generated_card_url TEXT,
+    festival_name VARCHAR(255),
+    quote_text TEXT,
+    background_image_url TEXT
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH claimed AS (
+        SELECT o.id
+        FROM wish_outbox o
+        WHERE (o.status = 'pending' AND o.next_attempt_at <= NOW())
+           OR (o.status = 'processing' AND o.locked_until < NOW())
+        ORDER BY o.next_attempt_at
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE wish_outbox o
+    SET status = 'processing',
+        locked_by = p_worker_id,
+        locked_until = NOW() + make_interval(secs => p_lease_seconds),
+        attempts = o.attempts + 1
+    FROM claimed c, generated_wishes w
+    LEFT JOIN festivals f ON f.id = w.festival_id
+    LEFT JOIN festival_quotes q ON q.id = w.quote_id
+    LEFT JOIN user_uploaded_images ui ON ui.id = w.user_image_id
+    LEFT JOIN festival_images fi ON fi.id = w.image_id
+    WHERE o.id = c.id AND w.id = o.wish_id
+    RETURNING o.id, o.wish_id, o.channel_type, o.recipient, o.attempts,
+              w.recipient_name, w.final_message, w.generated_card_url,
+              f.name, q.quote_text, COALESCE(ui.image_url, fi.image_url);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Record a batch of outcomes: sent ids, and failures as
+-- [{"id", "error", "permanent"}]. Failures back off exponentially with
+-- jitter until p_max_attempts; permanent ones are dead straight away
+CREATE OR REPLACE FUNCTION complete_wish_outbox(
+    p_sent UUID[],
+    p_failures JSONB,
+    p_base_delay_seconds INTEGER,
+    p_max_delay_seconds INTEGER,
+    p_max_attempts INTEGER
+) RETURNS VOID AS $$
+BEGIN
+    WITH sent AS (
+        UPDATE wish_outbox o
+        SET status = 'sent', locked_by = NULL, locked_until = NULL, last_error = NULL
+        WHERE o.id = ANY(p_sent)
+        RETURNING o.wish_id
+    )
+    UPDATE generated_wishes w
+    SET sent_status = 'sent', sent_at = NOW()
+    FROM sent
+    WHERE w.id = sent.wish_id;
+
+    WITH failed AS (
+        UPDATE wish_outbox o
+        SET status = CASE
+                WHEN COALESCE(f.permanent, FALSE) OR o.attempts >= p_max_attempts THEN 'dead'
+                ELSE 'pending'
+            END,
+            next_attempt_at = NOW() + make_interval(secs => LEAST(
+                p_max_delay_seconds,
+                p_base_delay_seconds * POWER(2, o.attempts - 1) * (0.5 + RANDOM())
+            )),
+            locked_by = NULL,
+            locked_until = NULL,
+            last_error = f.error
+        FROM jsonb_to_recordset(p_failures) AS f(id UUID, error TEXT, permanent BOOLEAN)
+        WHERE o.id = f.id
+        RETURNING o.wish_id, o.status
+    )
+    UPDATE generated_wishes w
+    SET sent_status = 'failed'
+    FROM failed
+    WHERE w.id = failed.wish_id AND failed.status = 'dead';
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,24 @@
+-- FestWish Database Schema
+-- Migration 005: Scheduled wish delivery
+
+-- When the user wants the wish delivered (NULL = immediately)
+ALTER TABLE generated_wishes ADD COLUMN scheduled_at TIMESTAMP WITH TIME ZONE;
+
+-- Scheduled deliveries wait in 'scheduled' until the delivery scheduler
+-- releases them to 'pending' for the workers
+CREATE INDEX idx_wish_outbox_scheduled ON wish_outbox(next_attempt_at, id)
+    WHERE status = 'scheduled';
+
+CREATE OR REPLACE FUNCTION enqueue_wish_delivery()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.scheduled_at IS NOT NULL AND NEW.scheduled_at > NOW() THEN
+        INSERT INTO wish_outbox (wish_id, channel_type, recipient, status, next_attempt_at)
+        VALUES (NEW.id, NEW.channel_type, NEW.recipient_contact, 'scheduled', NEW.scheduled_at);
+    ELSE
+        INSERT INTO wish_outbox (wish_id, channel_type, recipient)
+        VALUES (NEW.id, NEW.channel_type, NEW.recipient_contact);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,19 @@
+-- FestWish Database Schema
+-- Migration 006: Concrete per-year festival dates
+
+-- =====================================================
+-- FESTIVAL DATES TABLE (optional, one row per festival per year)
+-- =====================================================
+-- Lunar and lunisolar festivals move every year, so typical_month is only
+-- an approximation. When a row exists for a year it takes precedence.
+CREATE TABLE festival_dates (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    festival_id UUID NOT NULL REFERENCES festivals(id) ON DELETE CASCADE,
+    starts_on DATE NOT NULL,
+    ends_on DATE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE (festival_id, starts_on),
+    CHECK (ends_on >= starts_on)
+);
+
+CREATE INDEX idx_festival_dates_starts ON festival_dates(starts_on);
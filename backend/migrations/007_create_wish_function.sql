@@ -0,0 +1,93 @@
+-- FestWish Database Schema
+-- Migration 007: Create a wish in one call
+
+-- =====================================================
+-- CREATE WISH (validate, pick content and insert in one transaction)
+-- =====================================================
+-- Errors the API maps back to its own exceptions:
+--   P0002 (no_data_found)           festival or relationship missing;
+--                                   DETAIL is the resource, HINT the id
+--   22023 (invalid_parameter_value) no messages for the combo
+-- The insert fires enqueue_generated_wish_delivery like any other insert.
+CREATE OR REPLACE FUNCTION create_wish(
+    p_festival_id UUID,
+    p_relationship_id UUID,
+    p_user_id UUID DEFAULT NULL,
+    p_recipient_name TEXT DEFAULT NULL,
+    p_custom_message TEXT DEFAULT NULL,
+    p_user_image_id UUID DEFAULT NULL,
+    p_channel_type TEXT DEFAULT 'download',
+    p_recipient_contact TEXT DEFAULT NULL,
+    p_scheduled_at TIMESTAMP WITH TIME ZONE DEFAULT NULL
+) RETURNS SETOF generated_wishes AS $$
+DECLARE
+    v_festival_name VARCHAR(255);
+    v_relationship_name VARCHAR(100);
+    v_message_id UUID;
+    v_final_message TEXT;
+    v_image_id UUID;
+    v_quote_id UUID;
+    v_wish generated_wishes%ROWTYPE;
+BEGIN
+    SELECT f.name INTO v_festival_name
+    FROM festivals f
+    WHERE f.id = p_festival_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Festival not found'
+            USING ERRCODE = 'no_data_found', DETAIL = 'Festival', HINT = p_festival_id::TEXT;
+    END IF;
+
+    SELECT r.display_name INTO v_relationship_name
+    FROM relationships r
+    WHERE r.id = p_relationship_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Relationship not found'
+            USING ERRCODE = 'no_data_found', DETAIL = 'Relationship', HINT = p_relationship_id::TEXT;
+    END IF;
+
+    IF p_custom_message IS NOT NULL AND p_custom_message <> '' THEN
+        v_final_message := p_custom_message;
+    ELSE
+        SELECT wm.id, wm.message_text INTO v_message_id, v_final_message
+        FROM wish_messages wm
+        WHERE wm.festival_id = p_festival_id
+          AND wm.relationship_id = p_relationship_id
+          AND wm.is_active = TRUE
+        ORDER BY RANDOM()
+        LIMIT 1;
+        IF NOT FOUND THEN
+            RAISE EXCEPTION 'No messages available for % - %', v_festival_name, v_relationship_name
+                USING ERRCODE = 'invalid_parameter_value';
+        END IF;
+    END IF;
+
+    IF p_user_image_id IS NULL THEN
+        SELECT fi.id INTO v_image_id
+        FROM festival_images fi
+        WHERE fi.festival_id = p_festival_id
+          AND fi.is_active = TRUE
+        ORDER BY RANDOM()
+        LIMIT 1;
+    END IF;
+
+    SELECT fq.id INTO v_quote_id
+    FROM festival_quotes fq
+    WHERE fq.festival_id = p_festival_id
+      AND fq.is_active = TRUE
+    ORDER BY RANDOM()
+    LIMIT 1;
+
+    INSERT INTO generated_wishes (
+        user_id, festival_id, relationship_id, recipient_name, message_id,
+        custom_message, final_message, image_id, user_image_id, quote_id,
+        channel_type, sent_status, recipient_contact, scheduled_at
+    ) VALUES (
+        p_user_id, p_festival_id, p_relationship_id, p_recipient_name, v_message_id,
+        p_custom_message, v_final_message, v_image_id, p_user_image_id, v_quote_id,
+        p_channel_type, 'pending', p_recipient_contact, p_scheduled_at
+    )
+    RETURNING * INTO v_wish;
+
+    RETURN NEXT v_wish;
+END;
+$$ LANGUAGE plpgsql;
@@ -1,8 +1,8 @@
 """
 Festival Images Seeder
 =====================
-Uploads festival images from temp/festival_images to Supabase Storage
-and creates corresponding database records.
+Uploads festival images from temp/festival_images to the configured
+storage backend (STORAGE_BACKEND) and creates corresponding database records.
 
 Usage:
     python -m seeds.seed_images
@@ -23,6 +23,9 @@ load_dotenv()
 
 from supabase import create_client
 
+from app.core.config import settings
+from app.core.storage import StorageBackend, SupabaseStorage, get_storage
+
 
 # Mapping of image filenames (without extension) to festival slugs
 IMAGE_TO_FESTIVAL_MAPPING = {
@@ -98,10 +101,19 @@ def get_image_dimensions(image_path):
         return None, None
 
 
+def get_seed_storage(client, bucket_name) -> StorageBackend:
+    """Storage backend for seeding, reusing the seeder's Supabase client"""
+    if settings.STORAGE_BACKEND.lower() == "supabase":
+        return SupabaseStorage(client, bucket_name)
+    return get_storage()
+
+
 def seed_festival_images(client, images_dir, bucket_name="festwish-images"):
     """Upload festival images and create database records"""
     print("\n[Seeding Festival Images]")
     
+    storage = get_seed_storage(client, bucket_name)
+    
     # Get festival IDs from database
     festivals = client.table("festivals").select("id, slug, name").execute()
     festival_map = {f["slug"]: {"id": f["id"], "name": f["name"]} for f in festivals.data}
@@ -121,15 +133,16 @@ def seed_festival_images(client, images_dir, bucket_name="festwish-images"):
     total_skipped = 0
     
     # Create bucket if it doesn't exist (or verify it exists)
-    try:
-        buckets = client.storage.list_buckets()
-        bucket_exists = any(b["name"] == bucket_name for b in buckets)
-        if not bucket_exists:
-            print(f"  ! Warning: Bucket '{bucket_name}' does not exist. Please create it in Supabase Dashboard.")
-            print(f"  ! Go to Storage > Create a new bucket > Name: {bucket_name} > Public bucket: Yes")
-            return
-    except Exception as e:
-        print(f"  ! Could not verify bucket: {e}")
+    if storage.backend_type == "supabase":
+        try:
+            buckets = client.storage.list_buckets()
+            bucket_exists = any(b["name"] == bucket_name for b in buckets)
+            if not bucket_exists:
+                print(f"  ! Warning: Bucket '{bucket_name}' does not exist. Please create it in Supabase Dashboard.")
+                print(f"  ! Go to Storage > Create a new bucket > Name: {bucket_name} > Public bucket: Yes")
+                return
+        except Exception as e:
+            print(f"  ! Could not verify bucket: {e}")
     
     for image_file in image_files:
         filename = image_file.stem  # Filename without extension
@@ -183,24 +196,23 @@ def seed_festival_images(client, images_dir, bucket_name="festwish-images"):
             total_skipped += 1
             continue
         
-        # Upload to Supabase Storage
+        # Upload to storage
         storage_path = f"festival_images/{festival_slug}{extension}"
         
         try:
             # Upload file
-            client.storage.from_(bucket_name).upload(
+            storage.upload(
                 storage_path,
                 image_bytes,
-                {"content-type": f"image/{extension[1:]}"}  # image/png, image/jpg
+                f"image/{extension[1:]}"  # image/png, image/jpg
             )
             
             # Get signed URL (valid for 10 years since these are public festival images)
             # Note: For production, make the bucket public instead
-            signed_result = client.storage.from_(bucket_name).create_signed_url(
+            image_url = storage.create_signed_url(
                 storage_path, 
                 86400 * 3650  # 10 years in seconds
             )
-            image_url = signed_result['signedURL']
             
             # Get image dimensions
             width, height = get_image_dimensions(image_file)
@@ -233,11 +245,10 @@ def seed_festival_images(client, images_dir, bucket_name="festwish-images"):
                 # Try to insert database record anyway
                 try:
                     # Get signed URL for existing file
-                    signed_result = client.storage.from_(bucket_name).create_signed_url(
+                    image_url = storage.create_signed_url(
                         storage_path, 
                         86400 * 3650  # 10 years
                     )
-                    image_url = signed_result['signedURL']
                     width, height = get_image_dimensions(image_file)
                     
                     image_data = {
@@ -0,0 +1,87 @@
+"""Shared fixtures: an in-memory stand-in for the Supabase client"""
+
+from typing import Dict, List
+import os
+
+# Settings are read at import time; keep tests off any real project
+os.environ.setdefault("SUPABASE_URL", "http://supabase.test")
+os.environ.setdefault("SUPABASE_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
+
+import pytest
+
+from app.core import database
+from app.core.db_instrumentation import InstrumentedClient
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """
+    Records a PostgREST builder chain and answers execute() from in-memory
+    rows. eq, in_, range and limit filter; every other call is accepted as-is.
+    """
+
+    def __init__(self, db: "FakeSupabase", target: str, params=None):
+        self.db = db
+        self.target = target
+        self.params = params
+        self.calls = []
+
+    @property
+    def not_(self):
+        return self
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return call
+
+    def execute(self):
+        self.db.executed.append((self.target, [name for name, _, _ in self.calls]))
+        if self.target.startswith("rpc:"):
+            handler = self.db.rpcs.get(self.target[4:])
+            return FakeResponse(handler(self.params) if handler else None)
+
+        rows = list(self.db.tables.get(self.target, []))
+        for name, args, _ in self.calls:
+            if name == "eq":
+                rows = [row for row in rows if str(row.get(args[0])) == str(args[1])]
+            elif name == "in_":
+                wanted = {str(value) for value in args[1]}
+                rows = [row for row in rows if str(row.get(args[0])) in wanted]
+            elif name == "range":
+                rows = rows[args[0]:args[1] + 1]
+            elif name == "limit":
+                rows = rows[:args[0]]
+        return FakeResponse(rows)
+
+
+class FakeSupabase:
+    """Tables as lists of dicts, RPCs as callables, and a log of executed queries"""
+
+    def __init__(self, tables: Dict[str, List[dict]] = None, rpcs: Dict[str, object] = None):
+        self.tables = tables or {}
+        self.rpcs = rpcs or {}
+        self.executed = []
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, fn: str, params: dict) -> FakeQuery:
+        return FakeQuery(self, f"rpc:{fn}", params)
+
+
+@pytest.fixture
+def fake_db(monkeypatch) -> FakeSupabase:
+    """Route get_supabase() and get_supabase_admin() to one instrumented fake"""
+    fake = FakeSupabase()
+    client = InstrumentedClient(fake)
+    monkeypatch.setattr(database, "_supabase_client", client)
+    monkeypatch.setattr(database, "_supabase_admin_client", client)
+    return fake
@@ -0,0 +1,159 @@
+"""Catalog loading and HTTP caching of catalog endpoints"""
+
+from datetime import date
+from uuid import uuid4
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.core.db_instrumentation import InstrumentedClient
+from app.main import app
+from app.services import catalog_service
+from app.services.catalog_service import CatalogCache
+
+FESTIVAL_COUNT = 25
+
+
+def _festivals(count: int):
+    return [
+        {
+            "id": str(uuid4()),
+            "name": f"Festival {n:03d}",
+            "slug": f"festival-{n:03d}",
+            "religion_culture": "Hindu" if n % 2 else "Sikh",
+            "typical_month": "October",
+            "description": f"Festival number {n}",
+            "is_active": True,
+            "created_at": "2026-01-01T00:00:00+00:00"
+        }
+        for n in range(count)
+    ]
+
+
+@pytest.fixture
+def catalog_db(fake_db, monkeypatch):
+    fake_db.tables["festivals"] = _festivals(FESTIVAL_COUNT)
+    # Smaller than the table, so loading has to page
+    monkeypatch.setattr(settings, "CATALOG_PAGE_SIZE", 10)
+    monkeypatch.setattr(settings, "DEBUG", True)
+    monkeypatch.setattr(catalog_service, "catalog_cache", CatalogCache(client=InstrumentedClient(fake_db)))
+    return fake_db
+
+
+def _get(*requests):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.get(url, headers=headers) for url, headers in requests]
+
+    return asyncio.run(scenario())
+
+
+def test_catalog_load_pages_past_the_page_size(catalog_db):
+    snapshot = asyncio.run(catalog_service.catalog_cache.load())
+
+    assert len(snapshot.festivals) == FESTIVAL_COUNT
+    festival_reads = [ops for target, ops in catalog_db.executed if target == "festivals"]
+    assert len(festival_reads) == 3
+    # Each page is a fresh query with a single range
+    assert all(ops.count("range") == 1 for ops in festival_reads)
+
+
+def test_load_listeners_rerun_on_a_new_day(catalog_db, monkeypatch):
+    today = [date(2026, 10, 19)]
+
+    class FakeDate(date):
+        @classmethod
+        def today(cls):
+            return today[0]
+
+    monkeypatch.setattr(catalog_service, "date", FakeDate)
+    cache = catalog_service.catalog_cache
+    calls = []
+    cache.on_load(lambda snapshot: calls.append((snapshot.version, today[0])))
+
+    async def load_and_notify():
+        await cache.load()
+        if cache._notify_task is not None:
+            await cache._notify_task
+            cache._notify_task = None
+
+    async def scenario():
+        await load_and_notify()
+        await load_and_notify()
+        today[0] = date(2026, 10, 20)
+        await load_and_notify()
+        await load_and_notify()
+
+    asyncio.run(scenario())
+
+    # New version, then the unchanged version once more on the next day
+    version = cache._snapshot.version
+    assert calls == [(version, date(2026, 10, 19)), (version, date(2026, 10, 20))]
+
+
+def test_warm_catalog_list_makes_no_round_trips(catalog_db):
+    cold, warm = _get(("/api/v1/festivals", {}), ("/api/v1/festivals", {}))
+
+    assert cold.status_code == warm.status_code == 200
+    assert len(warm.json()["festivals"]) == FESTIVAL_COUNT
+    # 3 festival pages plus one page each for the other four tables
+    assert cold.headers["x-db-roundtrips"] == "7"
+    assert warm.headers["x-db-roundtrips"] == "0"
+
+
+def test_snapshot_bodies_are_cacheable_and_revalidate(catalog_db):
+    first, = _get(("/api/v1/festivals", {}))
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("public")
+
+    revalidated, = _get(("/api/v1/festivals", {"If-None-Match": etag}))
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+
+
+def test_read_through_bodies_carry_no_catalog_etag(catalog_db):
+    first, = _get(("/api/v1/festivals", {}))
+    etag = first.headers["etag"]
+    festival_id = catalog_db.tables["festivals"][0]["id"]
+
+    projected, missing = _get(
+        ("/api/v1/festivals?fields=name", {"If-None-Match": etag}),
+        (f"/api/v1/festivals/{uuid4()}", {"If-None-Match": etag}),
+    )
+
+    assert projected.status_code == 200
+    assert "etag" not in projected.headers
+    assert "public" not in projected.headers.get("cache-control", "")
+    # An id outside the snapshot must not be answered from the client's cache
+    assert missing.status_code == 404
+    assert "etag" not in missing.headers
+
+    detail, = _get((f"/api/v1/festivals/{festival_id}", {"If-None-Match": etag}))
+    assert detail.status_code == 304
+
+
+def test_best_level_compression_runs_off_the_event_loop(catalog_db, monkeypatch):
+    compress = catalog_service.compress
+    on_loop = []
+
+    def recording_compress(body, encoding, best=False):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return compress(body, encoding, best)
+
+    monkeypatch.setattr(catalog_service, "compress", recording_compress)
+    first, second = _get(
+        ("/api/v1/festivals", {"Accept-Encoding": "gzip"}),
+        ("/api/v1/festivals", {"Accept-Encoding": "gzip"}),
+    )
+
+    assert first.headers["content-encoding"] == second.headers["content-encoding"] == "gzip"
+    assert first.content == second.content
+    # Compressed once, in a worker thread, then served from the snapshot
+    assert on_loop == [False]
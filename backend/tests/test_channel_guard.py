@@ -0,0 +1,73 @@
+"""Circuit breaker probe slots in GuardedChannel"""
+
+import asyncio
+import time
+
+from app.services.channel_guard import CircuitBreaker, GuardedChannel, TokenBucket
+from app.services.messaging import DownloadChannel, SendResult, WishContent
+
+
+class BlockingChannel(DownloadChannel):
+    """Holds every send until released"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started = 0
+
+    async def send(self, recipient, content):
+        self.started += 1
+        await self.release.wait()
+        return SendResult(success=True)
+
+
+def _half_open(breaker: CircuitBreaker) -> None:
+    breaker._failures = breaker.failure_threshold
+    breaker._opened_at = time.monotonic() - breaker.reset_timeout
+
+
+def test_allow_hands_out_a_single_probe_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    assert breaker.allow() == CircuitBreaker.CLOSED
+    _half_open(breaker)
+
+    assert breaker.allow() == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() is None
+    # An ordinary slot handed back must not free the probe
+    breaker.release(CircuitBreaker.CLOSED)
+    assert breaker.allow() is None
+    breaker.release(CircuitBreaker.HALF_OPEN)
+    assert breaker.allow() == CircuitBreaker.HALF_OPEN
+
+
+def test_cancelled_caller_does_not_free_probe_slot_in_flight():
+    async def scenario():
+        channel = BlockingChannel()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        guarded = GuardedChannel(channel, TokenBucket(rate=0), breaker)
+        content = WishContent(recipient_name="Asha", message_text="Happy Holi")
+
+        # Sent while closed, still with the provider when the breaker trips
+        ordinary = asyncio.ensure_future(guarded.send("a", content))
+        await asyncio.sleep(0)
+        _half_open(breaker)
+        probe = asyncio.ensure_future(guarded.send("b", content))
+        await asyncio.sleep(0)
+        assert channel.started == 2
+
+        ordinary.cancel()
+        await asyncio.gather(ordinary, return_exceptions=True)
+
+        rejected = await asyncio.wait_for(guarded.send("c", content), timeout=1)
+        assert not rejected.success and "circuit open" in rejected.error
+        assert channel.started == 2
+
+        # Cancelling the probe itself gives the slot back
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        channel.release.set()
+        result = await guarded.send("d", content)
+        assert result.success
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
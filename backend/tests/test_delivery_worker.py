@@ -0,0 +1,176 @@
+"""DeliveryWorker against a fake outbox store and stub channels"""
+
+from typing import Dict, List
+import asyncio
+
+import pytest
+
+from app.services.delivery_worker import DeliveryWorker, OutboxStore
+from app.services.messaging import MessageChannel, MessageChannelFactory, SendResult
+
+
+class StubChannel(MessageChannel):
+    """Configured channel that fails for recipients starting with "bad" """
+
+    sent: List[tuple] = []
+
+    @property
+    def channel_type(self) -> str:
+        return "stub"
+
+    async def send(self, recipient, content):
+        StubChannel.sent.append((recipient, content))
+        if recipient.startswith("bad"):
+            return SendResult(success=False, error="mailbox full")
+        return SendResult(success=True, message_id=f"msg-{recipient}")
+
+    async def is_available(self) -> bool:
+        return True
+
+
+class FakeStore:
+    def __init__(self, rows: List[dict]):
+        self.rows = rows
+        self.card_urls: Dict[str, str] = {}
+        self.completed = None
+
+    async def claim(self, worker_id, batch_size, lease_seconds):
+        rows, self.rows = self.rows, []
+        return rows
+
+    async def set_card_url(self, wish_id, card_url):
+        self.card_urls[wish_id] = card_url
+
+    async def complete(self, sent_ids, failures, permanent=()):
+        self.completed = (sorted(sent_ids), dict(failures), set(permanent))
+
+
+class FakeCardService:
+    def __init__(self, fail_for=()):
+        self.fail_for = set(fail_for)
+        self.rendered = []
+
+    async def generate_card(self, background_image_url, message_text, recipient_name=None, quote_text=None):
+        if background_image_url in self.fail_for:
+            raise RuntimeError("background download failed")
+        self.rendered.append(background_image_url)
+        return b"jpeg"
+
+    async def save_card(self, card_bytes, wish_id):
+        return f"http://cards.test/{wish_id}.jpg"
+
+
+@pytest.fixture(autouse=True)
+def stub_channels(monkeypatch):
+    monkeypatch.setitem(MessageChannelFactory._channels, "stub", StubChannel)
+    monkeypatch.setattr(MessageChannelFactory, "_instances", {})
+    monkeypatch.setattr(MessageChannelFactory, "_semaphores", {})
+    monkeypatch.setattr(MessageChannelFactory, "_configured", {})
+    StubChannel.sent = []
+
+
+def _row(number, channel_type="stub", recipient=None, **extra):
+    return {
+        "id": f"outbox-{number}",
+        "wish_id": f"wish-{number}",
+        "channel_type": channel_type,
+        "recipient": recipient or f"friend{number}@example.test",
+        "attempts": 1,
+        "recipient_name": "Asha",
+        "final_message": "Happy Pongal",
+        "generated_card_url": f"http://cards.test/existing-{number}.jpg",
+        "festival_name": "Pongal",
+        "quote_text": None,
+        "background_image_url": None,
+        **extra
+    }
+
+
+def _run(worker: DeliveryWorker) -> int:
+    return asyncio.run(worker.run_once())
+
+
+def test_outcomes_are_completed_in_one_batch():
+    store = FakeStore([
+        _row(1),
+        _row(2, recipient="bad@example.test"),
+        _row(3, channel_type="sms", recipient="+15550100"),
+        _row(4, channel_type="pigeon", recipient="roof"),
+    ])
+
+    assert _run(DeliveryWorker(store=store, card_service=FakeCardService())) == 4
+
+    sent_ids, failures, permanent = store.completed
+    assert sent_ids == ["outbox-1"]
+    assert failures == {
+        "outbox-2": "mailbox full",
+        "outbox-3": "sms channel is not configured",
+        "outbox-4": "Unknown channel type: pigeon",
+    }
+    # A provider refusal is retried; unusable channels are not
+    assert permanent == {"outbox-3", "outbox-4"}
+    assert sorted(recipient for recipient, _ in StubChannel.sent) == [
+        "bad@example.test", "friend1@example.test"
+    ]
+
+
+def test_missing_card_is_rendered_before_sending():
+    store = FakeStore([
+        _row(1, generated_card_url=None, background_image_url="http://images.test/diya.jpg"),
+        _row(2),
+    ])
+    cards = FakeCardService()
+
+    _run(DeliveryWorker(store=store, card_service=cards))
+
+    assert cards.rendered == ["http://images.test/diya.jpg"]
+    assert store.card_urls == {"wish-1": "http://cards.test/wish-1.jpg"}
+    card_urls = {content.wish_id: content.card_url for _, content in StubChannel.sent}
+    assert card_urls == {
+        "wish-1": "http://cards.test/wish-1.jpg",
+        "wish-2": "http://cards.test/existing-2.jpg",
+    }
+    assert store.completed[0] == ["outbox-1", "outbox-2"]
+
+
+def test_failed_render_still_sends_without_card():
+    store = FakeStore([
+        _row(1, generated_card_url=None, background_image_url="http://images.test/missing.jpg"),
+    ])
+
+    _run(DeliveryWorker(store=store, card_service=FakeCardService(fail_for={"http://images.test/missing.jpg"})))
+
+    assert store.card_urls == {}
+    [(_, content)] = StubChannel.sent
+    assert content.card_url is None
+    assert store.completed == (["outbox-1"], {}, set())
+
+
+def test_no_card_is_rendered_for_unusable_channels():
+    store = FakeStore([
+        _row(1, channel_type="sms", generated_card_url=None, background_image_url="http://images.test/diya.jpg"),
+    ])
+    cards = FakeCardService()
+
+    _run(DeliveryWorker(store=store, card_service=cards))
+
+    assert cards.rendered == []
+    assert store.completed == ([], {"outbox-1": "sms channel is not configured"}, {"outbox-1"})
+
+
+def test_complete_sends_permanent_flags_in_one_rpc(fake_db):
+    calls = []
+    fake_db.rpcs["complete_wish_outbox"] = lambda params: calls.append(params)
+
+    asyncio.run(OutboxStore().complete(
+        ["outbox-1"],
+        {"outbox-2": "mailbox full", "outbox-3": "sms channel is not configured"},
+        {"outbox-3"}
+    ))
+
+    [params] = calls
+    assert params["p_sent"] == ["outbox-1"]
+    assert params["p_failures"] == [
+        {"id": "outbox-2", "error": "mailbox full", "permanent": False},
+        {"id": "outbox-3", "error": "sms channel is not configured", "permanent": True},
+    ]
@@ -0,0 +1,186 @@
+"""Email channel and SMTP pool against a local aiosmtpd server"""
+
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+import asyncio
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.core.config import settings
+from app.services.messaging import EmailChannel, WishContent, payload_cache
+from app.services import smtp_pool
+from app.services.smtp_pool import SMTPConnectionPool
+
+CARD_BYTES = b"\xff\xd8\xff\xe0 not really a jpeg \xff\xd9"
+
+
+class RecordingHandler:
+    """Keeps every message with the client address of the session it came in on"""
+
+    def __init__(self):
+        self.messages = []
+        self.drop_after_next = False
+        self.delay = 0.0
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.delay)
+        self.messages.append((session.peer, envelope.content))
+        if self.drop_after_next:
+            # Close the connection once the reply has been written
+            self.drop_after_next = False
+            asyncio.get_running_loop().call_soon(server.transport.close)
+        return "250 Message accepted for delivery"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    try:
+        yield controller, handler
+    finally:
+        controller.stop()
+
+
+def _pool(controller, size=1) -> SMTPConnectionPool:
+    return SMTPConnectionPool(
+        host=controller.hostname, port=controller.port, use_tls=False, size=size, timeout=5.0
+    )
+
+
+def _message(number: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "wishes@festwish.test"
+    message["To"] = f"friend{number}@example.test"
+    message["Subject"] = f"Wish {number}"
+    message.set_content("Happy Diwali!")
+    return message
+
+
+def test_pool_reuses_one_session_for_many_messages(smtp_server):
+    controller, handler = smtp_server
+    pool = _pool(controller)
+
+    async def scenario():
+        for number in range(3):
+            await pool.send(_message(number))
+        await pool.close()
+
+    asyncio.run(scenario())
+
+    assert len(handler.messages) == 3
+    assert len({peer for peer, _ in handler.messages}) == 1
+
+
+def test_pool_reconnects_after_server_drops_session(smtp_server):
+    controller, handler = smtp_server
+    pool = _pool(controller)
+
+    async def scenario():
+        handler.drop_after_next = True
+        await pool.send(_message(1))
+        # Let the server close the connection before the next send
+        await asyncio.sleep(0.2)
+        await pool.send(_message(2))
+        await pool.close()
+
+    asyncio.run(scenario())
+
+    assert len(handler.messages) == 2
+    first_peer, second_peer = (peer for peer, _ in handler.messages)
+    assert first_peer != second_peer
+
+
+def test_cancelled_send_keeps_session_until_its_thread_finishes(smtp_server):
+    controller, handler = smtp_server
+    handler.delay = 0.5
+    pool = _pool(controller)
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.send(_message(1)))
+        await asyncio.sleep(0.2)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        # The thread is still inside send_message with the only session
+        assert pool.idle == 0
+        handler.delay = 0.0
+        await pool.send(_message(2))
+        await pool.close()
+
+    asyncio.run(scenario())
+
+    subjects = [message_from_bytes(raw)["Subject"] for _, raw in handler.messages]
+    assert subjects == ["Wish 1", "Wish 2"]
+    assert len({peer for peer, _ in handler.messages}) == 1
+
+
+def test_pool_reconnects_when_idle_check_hits_a_dead_socket(smtp_server, monkeypatch):
+    controller, handler = smtp_server
+    pool = _pool(controller)
+
+    async def scenario():
+        await pool.send(_message(1))
+        [session] = pool._all
+
+        def noop():
+            raise ConnectionResetError("connection reset by peer")
+
+        monkeypatch.setattr(session.smtp, "noop", noop)
+        session.last_used -= smtp_pool.IDLE_CHECK_SECONDS + 1
+        await pool.send(_message(2))
+        await pool.close()
+
+    asyncio.run(scenario())
+
+    assert len(handler.messages) == 2
+    first_peer, second_peer = (peer for peer, _ in handler.messages)
+    assert first_peer != second_peer
+
+
+def test_email_embeds_card_as_related_cid_part(smtp_server, monkeypatch):
+    controller, handler = smtp_server
+    monkeypatch.setattr(settings, "SMTP_HOST", controller.hostname)
+    monkeypatch.setattr(settings, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(settings, "SMTP_USE_TLS", False)
+    monkeypatch.setattr(settings, "SMTP_USERNAME", "")
+
+    async def fetch_card(card_url):
+        return CARD_BYTES
+
+    monkeypatch.setattr(payload_cache, "_fetch_card", fetch_card)
+    channel = EmailChannel()
+    content = WishContent(
+        recipient_name="Asha",
+        message_text="May the festival of lights bring you joy.",
+        card_url="http://cards.test/email-cid-test.jpg",
+        festival_name="Diwali"
+    )
+
+    async def scenario():
+        result = await channel.send("asha@example.test", content)
+        await channel.pool.close()
+        return result
+
+    result = asyncio.run(scenario())
+
+    assert result.success
+    [(_, raw)] = handler.messages
+    message = message_from_bytes(raw, policy=policy.default)
+    assert message["Subject"] == "Happy Diwali!"
+
+    related = next(part for part in message.walk() if part.get_content_type() == "multipart/related")
+    html_part, image_part = related.iter_parts()
+    assert html_part.get_content_type() == "text/html"
+    assert f'src="cid:{EmailChannel.CARD_CID}"' in html_part.get_content()
+    assert image_part.get_content_type() == "image/jpeg"
+    assert image_part["Content-ID"] == f"<{EmailChannel.CARD_CID}>"
+    assert image_part.get_content() == CARD_BYTES
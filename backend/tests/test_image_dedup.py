@@ -0,0 +1,143 @@
+"""Near-duplicate detection for user uploads"""
+
+from io import BytesIO
+import asyncio
+import random
+
+from PIL import Image
+
+from app.services.image_service import (
+    DHASH_MAX_DISTANCE, ImageService, _hamming_distance, _hash_bands, _is_distinctive
+)
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """The slice of the PostgREST query builder find_duplicate uses, over a list of rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.max_rows = None
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def ov(self, column, values):
+        wanted = set(values)
+        self.filters.append(lambda row: bool(wanted & set(row.get(column) or ())))
+        return self
+
+    def limit(self, count):
+        self.max_rows = count
+        return self
+
+    def execute(self):
+        rows = [row for row in self.rows if all(f(row) for f in self.filters)]
+        return _Result(rows[:self.max_rows] if self.max_rows else rows)
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def table(self, name):
+        return FakeQuery(self.rows)
+
+
+def _service(rows) -> ImageService:
+    service = ImageService.__new__(ImageService)
+    service.client = FakeClient(rows)
+    service.table = "user_uploaded_images"
+    return service
+
+
+def _row(number, perceptual_hash, user_id="u1", size=(4032, 3024)):
+    return {
+        "id": f"img-{number}",
+        "user_id": user_id,
+        "content_hash": f"sha-{number}",
+        "perceptual_hash": perceptual_hash,
+        "perceptual_bands": _hash_bands(perceptual_hash),
+        "width": size[0],
+        "height": size[1],
+        "created_at": f"2026-01-01T00:00:{number:02d}+00:00"
+    }
+
+
+def _random_hash(rng) -> str:
+    while True:
+        value = f"{rng.getrandbits(64):016x}"
+        if _is_distinctive(value):
+            return value
+
+
+def _flip(perceptual_hash: str, bits) -> str:
+    value = int(perceptual_hash, 16)
+    for bit in bits:
+        value ^= 1 << bit
+    return f"{value:016x}"
+
+
+def test_bands_cover_all_bits_and_guarantee_a_shared_band():
+    rng = random.Random(7)
+    for _ in range(500):
+        original = _random_hash(rng)
+        bands = _hash_bands(original)
+        assert len(bands) == DHASH_MAX_DISTANCE + 1
+        near = _flip(original, rng.sample(range(64), DHASH_MAX_DISTANCE))
+        assert set(bands) & set(_hash_bands(near))
+
+
+def test_finds_near_duplicate_among_many_same_size_uploads():
+    rng = random.Random(42)
+    target = _random_hash(rng)
+    rows = [_row(n, _random_hash(rng)) for n in range(60)]
+    # The real match is the last of many same-size photos
+    rows.append(_row(60, _flip(target, [0, 17, 33, 63])))
+    service = _service(rows)
+
+    for _ in range(3):
+        match = asyncio.run(service.find_duplicate("u1", "sha-new", target, (4032, 3024)))
+        assert match is not None and match["id"] == "img-60"
+
+
+def test_prefers_closest_then_oldest_match():
+    rng = random.Random(3)
+    target = _random_hash(rng)
+    rows = [
+        _row(1, _flip(target, [1, 2, 3])),
+        _row(2, _flip(target, [5])),
+        _row(3, _flip(target, [9])),
+    ]
+    match = asyncio.run(_service(rows).find_duplicate("u1", "sha-new", target, (4032, 3024)))
+    assert match["id"] == "img-2"
+
+
+def test_ignores_other_sizes_users_and_distant_hashes():
+    rng = random.Random(5)
+    target = _random_hash(rng)
+    rows = [
+        _row(1, _flip(target, [1]), size=(3024, 4032)),
+        _row(2, _flip(target, [1]), user_id="u2"),
+        _row(3, _flip(target, range(0, 60, 10))),
+    ]
+    assert _hamming_distance(rows[2]["perceptual_hash"], target) > DHASH_MAX_DISTANCE
+    assert asyncio.run(_service(rows).find_duplicate("u1", "sha-new", target, (4032, 3024))) is None
+
+
+def test_flat_images_never_match():
+    flat = BytesIO()
+    Image.new("RGB", (64, 64), "white").save(flat, format="JPEG")
+    service = _service([_row(1, "0" * 16)])
+    perceptual_hash, size = service._perceptual_hash(flat.getvalue())
+    assert not _is_distinctive(perceptual_hash)
+    assert asyncio.run(service.find_duplicate("u1", "sha-new", perceptual_hash, size)) is None
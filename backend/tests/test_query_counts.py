@@ -0,0 +1,65 @@
+"""Supabase round-trips per request, so N+1 regressions fail loudly"""
+
+from uuid import uuid4
+import asyncio
+
+import httpx
+import pytest
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.db_instrumentation import track_queries
+from app.main import app
+from app.services.wish_service import WishService
+
+USER_ID = str(uuid4())
+
+
+def _wishes(count: int):
+    return [
+        {
+            "id": str(uuid4()),
+            "user_id": USER_ID,
+            "final_message": f"Wish {n}",
+            "created_at": f"2026-10-{n % 28 + 1:02d}T00:00:00+00:00"
+        }
+        for n in range(count)
+    ]
+
+
+@pytest.fixture
+def history_db(fake_db):
+    fake_db.tables["generated_wishes"] = _wishes(30)
+    return fake_db
+
+
+def test_wish_history_page_is_one_query(history_db):
+    async def scenario():
+        with track_queries() as stats:
+            wishes, next_cursor = await WishService().get_user_wishes(USER_ID, limit=10)
+        return stats, wishes, next_cursor
+
+    stats, wishes, next_cursor = asyncio.run(scenario())
+
+    assert len(wishes) == 10 and next_cursor
+    assert stats.count == 1
+    assert stats.shapes == ["generated_wishes select eq(user_id) order(created_at.desc,id) limit"]
+
+
+def test_wish_history_endpoint_round_trips(history_db, monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG", True)
+    app.dependency_overrides[get_current_user] = lambda: {"id": USER_ID}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/v1/wishes/history", params={"limit": 25})
+
+    try:
+        response = asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+    assert response.status_code == 200
+    assert len(response.json()["wishes"]) == 25
+    assert response.headers["x-db-roundtrips"] == "1"
@@ -0,0 +1,55 @@
+"""Search index maintenance across catalog versions"""
+
+import asyncio
+
+from app.core.db_instrumentation import InstrumentedClient
+from app.services import search_service
+from app.services.catalog_service import catalog_cache
+from app.services.search_service import FestivalSearch, SearchIndex
+
+
+def _festival(n: int, description: str):
+    return {
+        "id": f"00000000-0000-0000-0000-{n:012d}",
+        "name": f"Festival {n}",
+        "slug": f"festival-{n}",
+        "religion_culture": "Hindu",
+        "typical_month": "October",
+        "description": description,
+        "is_active": True,
+    }
+
+
+def test_index_is_built_when_a_catalog_version_loads(fake_db, monkeypatch):
+    search = FestivalSearch()
+    monkeypatch.setattr(catalog_cache, "_client", InstrumentedClient(fake_db))
+    monkeypatch.setattr(catalog_cache, "_snapshot", None)
+    monkeypatch.setattr(catalog_cache, "_listeners", [search.index_for])
+    builds = []
+    build = SearchIndex.build.__func__
+
+    def recording_build(cls, catalog, previous=None):
+        builds.append(catalog.version)
+        return build(cls, catalog, previous)
+
+    monkeypatch.setattr(SearchIndex, "build", classmethod(recording_build))
+
+    async def scenario():
+        fake_db.tables["festivals"] = [_festival(1, "lamps and sweets")]
+        first = await catalog_cache.load()
+        await catalog_cache._notify_task
+        fake_db.tables["festivals"] = [_festival(1, "lamps and sweets"), _festival(2, "colours")]
+        second = await catalog_cache.load()
+        await catalog_cache._notify_task
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert builds == [first.version, second.version]
+    # Searches find the index ready rather than building it
+    assert [row["slug"] for row in search.search(second, "colours", ["id", "slug"])] == ["festival-2"]
+    assert builds == [first.version, second.version]
+
+
+def test_search_index_is_registered_with_the_catalog_cache():
+    assert search_service.festival_search.index_for in catalog_cache._listeners
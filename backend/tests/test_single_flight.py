@@ -0,0 +1,47 @@
+"""Single-flight coalescing of concurrent festival reads"""
+
+from uuid import uuid4
+import asyncio
+
+from app.core.db_instrumentation import track_queries
+from app.core.metrics import registry
+from app.services.festival_service import FestivalService, reads
+
+FESTIVAL_ID = str(uuid4())
+
+
+def test_concurrent_identical_reads_make_one_query(fake_db):
+    fake_db.tables["festival_quotes"] = [
+        {"id": str(uuid4()), "festival_id": FESTIVAL_ID, "quote_text": "Light wins", "is_active": True}
+    ]
+    leaders, followers = reads.leaders, reads.followers
+
+    async def scenario():
+        service = FestivalService()
+        with track_queries() as stats:
+            results = await asyncio.gather(*(service.get_quotes(FESTIVAL_ID) for _ in range(10)))
+        return stats, results
+
+    stats, results = asyncio.run(scenario())
+
+    assert stats.count == 1
+    assert len([target for target, _ in fake_db.executed if target == "festival_quotes"]) == 1
+    assert all(result == results[0] for result in results)
+    assert (reads.leaders - leaders, reads.followers - followers) == (1, 9)
+
+
+def test_different_arguments_are_not_coalesced(fake_db):
+    async def scenario():
+        service = FestivalService()
+        with track_queries() as stats:
+            await asyncio.gather(service.get_quotes(str(uuid4())), service.get_quotes(str(uuid4())))
+        return stats
+
+    assert asyncio.run(scenario()).count == 2
+
+
+def test_exported_as_singleflight_counters_not_cache():
+    text = registry.render()
+    assert 'festwish_singleflight_followers_total{group="festival_reads"}' in text
+    assert 'festwish_singleflight_leaders_total{group="festival_reads"}' in text
+    assert 'cache="festival_reads"' not in text
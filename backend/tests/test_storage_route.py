@@ -0,0 +1,49 @@
+"""Sending local storage objects"""
+
+import asyncio
+
+from app.api.storage import ZeroCopyFileResponse
+
+BODY = b"card bytes " * 10000
+
+
+def _send(path, extensions=None, method="GET"):
+    scope = {"type": "http", "method": method, "headers": [], "extensions": extensions or {}}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            message = {**message, "content": message["file"].read()}
+        messages.append(message)
+
+    asyncio.run(ZeroCopyFileResponse(path)(scope, receive, send))
+    return messages
+
+
+def test_file_is_handed_to_the_server_when_it_supports_zero_copy(tmp_path):
+    path = tmp_path / "card.png"
+    path.write_bytes(BODY)
+
+    start, body = _send(path, {"http.response.zerocopysend": {}})
+
+    assert dict(start["headers"])[b"content-length"] == str(len(BODY)).encode()
+    assert dict(start["headers"])[b"content-type"] == b"image/png"
+    assert body["type"] == "http.response.zerocopysend"
+    assert body["content"] == BODY
+    assert body["file"].closed
+
+
+def test_file_is_streamed_without_the_extension(tmp_path):
+    path = tmp_path / "card.png"
+    path.write_bytes(BODY)
+
+    start, *chunks = _send(path)
+
+    assert {m["type"] for m in chunks} == {"http.response.body"}
+    assert b"".join(m["body"] for m in chunks) == BODY
+
+    start, head = _send(path, {"http.response.zerocopysend": {}}, method="HEAD")
+    assert head == {"type": "http.response.body", "body": b"", "more_body": False}
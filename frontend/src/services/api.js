@@ -9,12 +9,23 @@ const api = axios.create({
   },
 })
 
+// Per-tab session id: lets the API rotate "shuffle" content without repeats
+const getSessionId = () => {
+  let sessionId = sessionStorage.getItem('session_id')
+  if (!sessionId) {
+    sessionId = crypto.randomUUID()
+    sessionStorage.setItem('session_id', sessionId)
+  }
+  return sessionId
+}
+
 // Add auth token to requests
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('access_token')
   if (token) {
     config.headers.Authorization = `Bearer ${token}`
   }
+  config.headers['X-Session-Id'] = getSessionId()
   return config
 })
 
@@ -64,7 +75,7 @@ export const wishApi = {
   getById: (id) => api.get(`/wishes/${id}`),
   generateCard: (id) => api.post(`/wishes/${id}/generate-card`),
   download: (id) => api.get(`/wishes/${id}/download`),
-  getHistory: () => api.get('/wishes/history'),
+  getHistory: (params) => api.get('/wishes/history', { params }),
   getChannels: () => api.get('/wishes/channels/available'),
 }
 
@@ -77,7 +88,7 @@ export const imageApi = {
       headers: { 'Content-Type': 'multipart/form-data' },
     })
   },
-  getMyImages: () => api.get('/images/my-images'),
+  getMyImages: (params) => api.get('/images/my-images', { params }),
   delete: (id) => api.delete(`/images/${id}`),
   getFestivalImages: (festivalId) => api.get(`/images/festival/${festivalId}`),
 }